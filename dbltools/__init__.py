@@ -2,7 +2,10 @@ from redbot.core.bot import Red
 from .dbltools import DblTools
 
 __red_end_user_data_statement__ = (
-    "This cog does not persistently store data or metadata about users."
+    "This cog stores the Discord IDs of users who voted for the bot on Top.gg, until when their "
+    "vote counts, and whether they opted in to daily reminders. It also caches usernames of "
+    "voters and bot owners for up to a week to display them. Users can delete this data with "
+    "the data deletion commands."
 )
 
 
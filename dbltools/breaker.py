@@ -0,0 +1,110 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is rejected because the upstream service is considered down."""
+
+
+class CircuitBreaker:
+    """Track the health of an upstream service and fail fast while it is down.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls are rejected
+    with :class:`CircuitOpen`. After ``reset_timeout`` seconds, one probe call is let through
+    (half-open): it closes the circuit on success, or opens it again on failure.
+
+    Successful results are remembered per key, so callers can answer with the last known data
+    while the circuit is open. Calls with a ``None`` key, such as writes, are not remembered.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 3,
+        reset_timeout: int = 60,
+        call_timeout: int = 10,
+        is_failure: Callable[[BaseException], bool] = lambda error: True,
+        max_remembered: int = 32,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.is_failure = is_failure
+        self.max_remembered = max_remembered
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_success = 0.0
+        self.last_failure = 0.0
+        self.last_error: Optional[BaseException] = None
+        self.rejected = 0
+        self._probing = False
+        self._results: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def last(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return ``(result, timestamp)`` of the last successful call for ``key``, if any."""
+        return self._results.get(key)
+
+    def _allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def _record_success(self, key: Hashable, result: Any):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_success = time.time()
+        if key is None:
+            return
+        self._results[key] = (result, self.last_success)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_remembered:
+            self._results.popitem(last=False)
+
+    def _record_failure(self, error: BaseException):
+        self.failures += 1
+        self.last_failure = time.time()
+        self.last_error = error
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = self.last_failure
+
+    async def call(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Await ``func(*args)`` with a timeout, if the circuit allows it.
+
+        The result is remembered under ``key``, unless it is ``None``.
+        """
+        if not self._allow():
+            self.rejected += 1
+            raise CircuitOpen()
+        probing = self.state == self.HALF_OPEN
+        try:
+            result = await asyncio.wait_for(func(*args), self.call_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            if self.is_failure(error):
+                self._record_failure(error)
+            elif probing:
+                # The service answered, even if with an error for this request.
+                self.state = self.CLOSED
+                self.failures = 0
+            raise
+        else:
+            self._record_success(key, result)
+            return result
+        finally:
+            if probing:
+                self._probing = False
@@ -2,6 +2,7 @@ import discord
 from redbot.core.bot import Red
 from redbot.core.i18n import Translator, cog_i18n
 from redbot.core import bank, commands, Config, checks, errors
+from redbot.core.data_manager import cog_data_path
 from redbot.core.utils.chat_formatting import (
     bold,
     box,
@@ -19,18 +20,34 @@ import logging
 import asyncio
 import calendar
 from uuid import uuid4
-from typing import Mapping
+from typing import List, Mapping
 from tabulate import tabulate
-from collections import Counter
 from datetime import datetime, timedelta
 
+from .breaker import CircuitBreaker, CircuitOpen
+from .export import COMPRESS_ROWS, ENCODERS, count_votes, vote_rows, write_export
 from .utils import check_weekend, download_widget, error_message, guild_only_check, intro_msg
+from .posters import POSTERS, PostRejected, StatsPoster, StatsPosterManager, TopggPoster
+from .registry import RegistryUnreadable, VoterRegistry
+from .reminders import ReminderDispatcher
+from .resolver import UserResolver
+from .templates import TemplateCache
+from .tracing import Tracer, span, traced
+from .votestats import VoteStats
+from .webhook import VoteWebhook
 
 
 log = logging.getLogger("red.predacogs.DblTools")
 _ = Translator("DblTools", __file__)
 
 
+def topgg_is_down(error: BaseException) -> bool:
+    # Those errors are about the request itself, Top.gg did answer.
+    return not isinstance(
+        error, (dbl.Unauthorized, dbl.UnauthorizedDetected, dbl.NotFound, PostRejected)
+    )
+
+
 @cog_i18n(_)
 class DblTools(commands.Cog):
     """Tools for Top.gg API."""
@@ -38,22 +55,35 @@ class DblTools(commands.Cog):
     __author__ = "Predä"
     __version__ = "2.1.2_brandjuh"
 
-    async def red_delete_data_for_user(self, **kwargs):
-        """Nothing to delete."""
-        return
+    async def red_delete_data_for_user(self, *, requester, user_id: int):
+        self.resolver.forget(user_id)
+        self.reminder_users.discard(user_id)
+        self.reminder_dispatcher.cancel(user_id)
+        if self.voter_registry is not None:
+            self.voter_registry.set(user_id, 0)
+        group = self.config.user_from_id(user_id)
+        async with group.get_lock():
+            await group.clear()
 
     def __init__(self, bot: Red):
         self.bot = bot
         self.dbl = None
+        self.webhook = None
 
         self.config = Config.get_conf(
             self, identifier=51222797489301095423, force_registration=True
         )
         self.config.register_global(
             post_guild_count=False,
+            stats_posters=[],
             webhook_auth=None,
             webhook_port=None,
+            webhook_high_water=500,
             votes_channel=None,
+            voter_registry=False,
+            reminders_rate=5.0,
+            trace_sample_rate=0.0,
+            trace_threshold_ms=500,
             support_server_role={"guild_id": None, "role_id": None},
             daily_rewards={
                 "toggled": False,
@@ -62,12 +92,27 @@ class DblTools(commands.Cog):
                 "weekend_bonus_amount": 500,
             },
         )
-        self.config.register_user(voted=False, next_daily=0)
+        self.config.register_user(voted=False, next_daily=0, daily_reminder=False)
 
         self.economy_cog = None
         self.session = aiohttp.ClientSession()
+        self.topgg_breaker = CircuitBreaker(is_failure=topgg_is_down)
+        self.tracer = Tracer()
+        self.stats_posters = StatsPosterManager(self.session)
+        self.vote_stats_path = cog_data_path(self) / "votestats.bin"
+        self.vote_stats = VoteStats.load(self.vote_stats_path)
+        self.voter_registry = None
+        self._registry_flush_lock = asyncio.Lock()
+        self.resolver = UserResolver(bot, cog_data_path(self) / "users.json")
+        self.templates = TemplateCache()
+        self.reminder_users = set()
+        self.reminder_dispatcher = ReminderDispatcher(self.send_daily_reminder)
+        self._reminders_loaded = False
         self._init_task = bot.loop.create_task(self.initialize())
         self._post_stats_task = self.bot.loop.create_task(self.update_stats())
+        self._save_data_task = self.bot.loop.create_task(self.save_data())
+        self._compaction_lock = asyncio.Lock()
+        self._compaction_task = self.bot.loop.create_task(self.compact_voters_loop())
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         """Thanks Sinbad!"""
@@ -78,24 +123,65 @@ class DblTools(commands.Cog):
         await self.bot.wait_until_ready()
         key = (await self.bot.get_shared_api_tokens("dbl")).get("api_key")
         config = await self.config.all()
-        self.dbl = dbl.DBLClient(
-            bot=self.bot,
-            token=key,
-            session=self.session,
-            webhook_port=config["webhook_port"],
-            webhook_auth=config["webhook_auth"],
+        self.tracer.sample_rate = config["trace_sample_rate"]
+        self.tracer.threshold = config["trace_threshold_ms"] / 1000
+        self.dbl = dbl.DBLClient(bot=self.bot, token=key, session=self.session)
+        await self.start_webhook(config)
+        if config["voter_registry"] and self.voter_registry is None:
+            self.voter_registry = VoterRegistry(cog_data_path(self) / "voters.bin")
+        if not self._reminders_loaded:
+            await self.load_reminders(config["reminders_rate"])
+
+    async def start_webhook(self, config: dict):
+        # Votes are received by our own server rather than dblpy's, to bound the backlog.
+        if self.webhook is not None:
+            await self.webhook.stop()
+            self.webhook = None
+        if not config["webhook_port"] or not config["webhook_auth"]:
+            return
+        webhook = VoteWebhook(
+            self.on_dbl_vote,
+            self.on_dbl_test,
+            dispatch=self.bot.dispatch,
+            auth=config["webhook_auth"],
+            port=config["webhook_port"],
+            high_water=config["webhook_high_water"],
         )
+        try:
+            await webhook.start()
+        except OSError as error:
+            await webhook.stop()
+            log.exception("Failed to start the webhook server.", exc_info=error)
+            return
+        self.webhook = webhook
 
     def cog_unload(self):
-        self.bot.loop.create_task(self.session.close())
         if self._init_task:
             self._init_task.cancel()
         if self._post_stats_task:
             self._post_stats_task.cancel()
+        if self._save_data_task:
+            self._save_data_task.cancel()
+        if self._compaction_task:
+            self._compaction_task.cancel()
+        self.bot.loop.create_task(self.teardown())
         payday_command = self.bot.get_command("payday")
         if payday_command:
             self.bot.remove_command(payday_command.name)
 
+    async def teardown(self):
+        # In this order, so votes drained from the webhook queue are still saved.
+        if self.webhook is not None:
+            await self.webhook.stop()
+            self.webhook = None
+        self.reminder_dispatcher.stop()
+        if self.vote_stats.dirty:
+            self.vote_stats.save(self.vote_stats_path)
+        if self.resolver.dirty:
+            await self.resolver.save()
+        await self.close_voter_registry()
+        await self.session.close()
+
     async def cog_before_invoke(self, ctx: commands.Context):
         if ctx.command.name == "payday":
             cog = self.bot.get_cog("Economy")
@@ -103,22 +189,230 @@ class DblTools(commands.Cog):
                 return
             self.economy_cog = cog
 
+    async def get_stats_posters(self) -> List[StatsPoster]:
+        config = await self.config.all()
+        names = list(config["stats_posters"])
+        if config["post_guild_count"]:
+            names.insert(0, TopggPoster.name)
+        posters = []
+        for name in names:
+            if name not in POSTERS:
+                log.warning("Unknown stats directory %s, skipping stats post.", name)
+                continue
+            token = (await self.bot.get_shared_api_tokens(name)).get("api_key")
+            if not token:
+                log.warning("No API key set for %s, skipping stats post.", POSTERS[name].title)
+                continue
+            breaker = self.topgg_breaker if name == TopggPoster.name else None
+            posters.append(POSTERS[name](self.bot.user.id, token, breaker=breaker))
+        return posters
+
     async def update_stats(self):
         await self.bot.wait_until_ready()
         while True:
-            if await self.config.post_guild_count():
-                try:
-                    await self.dbl.post_guild_count()
-                    log.info(
-                        "Posted server count to Top.gg {} servers.".format(self.dbl.guild_count())
-                    )
-                except Exception as error:
-                    log.exception(
-                        "Failed to post server count\n{}: {}".format(type(error).__name__, error)
-                    )
+            try:
+                posters = await self.get_stats_posters()
+                if posters:
+                    guild_count, shard_count = len(self.bot.guilds), self.bot.shard_count or 1
+                    for poster, posted in await self.stats_posters.post_all(
+                        posters, guild_count, shard_count
+                    ):
+                        if posted:
+                            log.info(
+                                "Posted server count to %s %s servers.", poster.title, guild_count
+                            )
+            except Exception as error:
+                log.exception(
+                    "Failed to post server count\n{}: {}".format(type(error).__name__, error)
+                )
             await asyncio.sleep(1800)
 
+    async def save_data(self):
+        while True:
+            await asyncio.sleep(300)
+            if self.vote_stats.dirty:
+                try:
+                    self.vote_stats.save(self.vote_stats_path)
+                except OSError as error:
+                    log.exception("Failed to save votes stats.", exc_info=error)
+            if self.resolver.dirty:
+                try:
+                    await self.resolver.save()
+                except OSError as error:
+                    log.exception("Failed to save users cache.", exc_info=error)
+            if self.voter_registry is not None and self.voter_registry.pending:
+                await self.flush_voter_registry()
+
+    async def flush_voter_registry(self, prune_before: int = 0) -> int:
+        async with self._registry_flush_lock:
+            registry = self.voter_registry
+            if registry is None:
+                return 0
+            registry.begin_flush()
+            write = self.bot.loop.run_in_executor(None, registry.write_flush, prune_before)
+            try:
+                dropped = await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The write goes on in its thread, finish the flush before giving the lock up.
+                await asyncio.wait([write])
+                registry.end_flush(success=write.exception() is None)
+                raise
+            except (OSError, RegistryUnreadable) as error:
+                registry.end_flush(success=False)
+                log.exception("Failed to save voters registry.", exc_info=error)
+                return 0
+            registry.end_flush()
+            return dropped
+
+    async def close_voter_registry(self):
+        """Flush the registry, waiting for any flush in progress, then close it."""
+        await self.flush_voter_registry()
+        async with self._registry_flush_lock:
+            registry, self.voter_registry = self.voter_registry, None
+            if registry is not None:
+                registry.close()
+
+    async def topgg_request(self, key, func, *args):
+        """
+        Call the Top.gg client through the circuit breaker.
+
+        Returns ``(data, fetched_at)``, ``fetched_at`` being ``None`` for fresh data. While Top.gg
+        is unavailable, the last known data for ``key`` is returned, or CircuitOpen is raised.
+        """
+        try:
+            return await self.topgg_breaker.call(key, func, *args), None
+        except Exception as error:
+            if not isinstance(error, CircuitOpen):
+                if not topgg_is_down(error):
+                    raise
+                log.error("Failed to fetch Top.gg API.", exc_info=error)
+            last = self.topgg_breaker.last(key)
+            if last is None:
+                if isinstance(error, CircuitOpen):
+                    raise
+                raise CircuitOpen() from error
+            return last
+
+    async def get_votes_count(self):
+        # Only the per-user counts are kept, and remembered by the breaker, not the full payload.
+        return count_votes(await self.dbl.get_bot_upvotes())
+
+    @staticmethod
+    def stale_notice(fetched_at: float) -> str:
+        delta = humanize_timedelta(seconds=int(time.time() - fetched_at)) or _("a moment")
+        return _("Top.gg is unavailable, showing data from {} ago.").format(delta)
+
+    async def get_next_daily(self, user_id: int) -> int:
+        if self.voter_registry is not None:
+            return self.voter_registry.get(user_id)
+        return await self.config.user_from_id(user_id).next_daily()
+
+    async def set_next_daily(self, user_id: int, next_daily: int):
+        if user_id in self.reminder_users and next_daily:
+            self.reminder_dispatcher.schedule(user_id, next_daily)
+        if self.voter_registry is not None:
+            return self.voter_registry.set(user_id, next_daily)
+        # The context manager holds the user's Config lock, which compaction also takes.
+        async with self.config.user_from_id(user_id).all() as user_data:
+            user_data["voted"] = bool(next_daily)
+            user_data["next_daily"] = next_daily
+
+    async def compact_voters_loop(self):
+        await self.bot.wait_until_ready()
+        while True:
+            await asyncio.sleep(6 * 3600)
+            try:
+                await self.compact_voters()
+            except Exception as error:
+                log.exception("Failed to compact voters data.", exc_info=error)
+
+    async def compact_voters(self, batch_size: int = 500, pause: float = 1.0) -> dict:
+        """
+        Remove voters data that is expired or only holds default values.
+
+        Users are processed in batches of ``batch_size``, sleeping ``pause`` seconds between
+        batches. Each user is re-checked under its Config lock, so votes received meanwhile are
+        kept.
+        """
+        async with self._compaction_lock:
+            started = time.monotonic()
+            now = int(time.time())
+            report = {"scanned": 0, "cleared": 0, "reset": 0, "registry": 0}
+            if self.voter_registry is not None:
+                report["registry"] = await self.flush_voter_registry(prune_before=now)
+            users = await self.config.all_users()
+            report["scanned"] = len(users)
+            stale = [user_id for user_id, data in users.items() if data["next_daily"] < now]
+            del users
+            for start in range(0, len(stale), batch_size):
+                for user_id in stale[start : start + batch_size]:
+                    group = self.config.user_from_id(user_id)
+                    async with group.get_lock():
+                        data = await group.all()
+                        if data["next_daily"] >= int(time.time()):
+                            continue
+                        if data["daily_reminder"]:
+                            # Keep the reminder setting, only drop the expired vote.
+                            if data["voted"] or data["next_daily"]:
+                                await group.voted.clear()
+                                await group.next_daily.clear()
+                                report["reset"] += 1
+                        else:
+                            await group.clear()
+                            report["cleared"] += 1
+                await asyncio.sleep(pause)
+            report["duration"] = time.monotonic() - started
+            log.info(
+                "Compacted voters data: %s users scanned, %s cleared, %s reset, "
+                "%s removed from registry.",
+                report["scanned"],
+                report["cleared"],
+                report["reset"],
+                report["registry"],
+            )
+            return report
+
+    async def load_reminders(self, rate: float):
+        self._reminders_loaded = True
+        self.reminder_dispatcher.set_rate(rate)
+        now = int(time.time())
+        for user_id, data in (await self.config.all_users()).items():
+            if not data.get("daily_reminder"):
+                continue
+            self.reminder_users.add(user_id)
+            next_daily = await self.get_next_daily(user_id)
+            if next_daily > now:
+                # Reminders restored on startup go after the ones scheduled by new votes.
+                self.reminder_dispatcher.schedule(user_id, next_daily, priority=1)
+        self.reminder_dispatcher.start()
+
+    async def send_daily_reminder(self, user_id: int) -> bool:
+        if user_id not in self.reminder_users:
+            return False
+        if await self.get_next_daily(user_id) > int(time.time()):
+            return False
+        user = self.bot.get_user(user_id)
+        if not user:
+            return False
+        try:
+            await user.send(
+                _(
+                    "Your daily bonus is ready! You can vote for {bot_name} again to claim it: {url}"
+                ).format(
+                    bot_name=self.bot.user.name, url=f"https://top.gg/bot/{self.bot.user.id}/vote"
+                )
+            )
+        except discord.Forbidden:
+            self.reminder_users.discard(user_id)
+            group = self.config.user(user)
+            async with group.get_lock():
+                await group.daily_reminder.set(False)
+            return False
+        return True
+
     async def check_vote(self, user_id: int):
+        if self.voter_registry is not None:
+            return self.voter_registry.get(user_id) >= int(time.time())
         async with self.config.user_from_id(user_id).all() as user_data:
             if user_data["next_daily"] < int(time.time()):
                 user_data["voted"] = False
@@ -133,13 +427,8 @@ class DblTools(commands.Cog):
         try:
             if self.dbl:
                 self.dbl.close()
-            config = await self.config.all()
             client = dbl.DBLClient(
-                bot=self.bot,
-                token=api_tokens.get("api_key"),
-                session=self.session,
-                webhook_port=config["webhook_port"],
-                webhook_auth=config["webhook_auth"],
+                bot=self.bot, token=api_tokens.get("api_key"), session=self.session
             )
             await client.get_guild_count()
         except (dbl.Unauthorized, dbl.UnauthorizedDetected):
@@ -157,6 +446,14 @@ class DblTools(commands.Cog):
             )
         self.dbl = client
 
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx: commands.Context):
+        # Core commands changing the locale or currency name used by the message templates.
+        if ctx.command.qualified_name.startswith(
+            ("set locale", "set regionalformat", "bankset creditsname")
+        ):
+            self.templates.invalidate()
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         await self.bot.wait_until_ready()
@@ -165,7 +462,10 @@ class DblTools(commands.Cog):
             return
         if not config["support_server_role"]["role_id"]:
             return
-        voted = await self.config.user(member).voted()
+        if self.voter_registry is not None:
+            voted = self.voter_registry.get(member.id) >= int(time.time())
+        else:
+            voted = await self.config.user(member).voted()
         if voted:
             try:
                 await member.add_roles(
@@ -183,14 +483,17 @@ class DblTools(commands.Cog):
                     config["support_server_role"]["guild_id"] = None
                     config["support_server_role"]["role_id"] = None
 
-    @commands.Cog.listener()
+    @traced("on_dbl_vote")
     async def on_dbl_vote(self, data: dict):
-        global_config = await self.config.all()
+        self.vote_stats.record()
+        with span("config", "all"):
+            global_config = await self.config.all()
         if not global_config["daily_rewards"]["toggled"]:
             return
-        async with self.config.user_from_id(int(data["user"])).all() as config:
-            config["voted"] = True
-            config["next_daily"] = int(datetime.timestamp(datetime.now() + timedelta(hours=12)))
+        with span("config", "set_next_daily"):
+            await self.set_next_daily(
+                int(data["user"]), int(datetime.timestamp(datetime.now() + timedelta(hours=12)))
+            )
         user = self.bot.get_user(int(data["user"]))
         if not user:
             log.error(
@@ -201,49 +504,44 @@ class DblTools(commands.Cog):
         regular_amount = global_config["daily_rewards"]["amount"]
         weekend_amount = global_config["daily_rewards"]["weekend_bonus_amount"]
         weekend = check_weekend() and global_config["daily_rewards"]["weekend_bonus_toggled"]
-        credits_name = await bank.get_currency_name()
+        with span("bank", "get_currency_name"):
+            templates = await self.templates.get(self.bot.user, global_config["daily_rewards"])
         try:
-            await bank.deposit_credits(
-                user, amount=regular_amount + weekend_amount if weekend else regular_amount
-            )
+            with span("bank", "deposit_credits"):
+                await bank.deposit_credits(
+                    user, amount=regular_amount + weekend_amount if weekend else regular_amount
+                )
         except errors.BalanceTooHigh as exc:
-            await bank.set_balance(user, exc.max_balance)
-            await user.send(
-                embed=discord.Embed(
-                    title="Thanks for your upvote!",
-                    description=_(
-                        "However, you've reached the maximum amount of {currency}! (**{new_balance}**) "
-                        "Please spend some more \N{GRIMACING FACE}\n\n"
-                        "You currently have {new_balance} {currency}."
-                    ).format(currency=credits_name, new_balance=humanize_number(exc.max_balance)),
+            with span("bank", "set_balance"):
+                await bank.set_balance(user, exc.max_balance)
+            with span("discord", "send"):
+                await user.send(
+                    embed=discord.Embed(
+                        title="Thanks for your upvote!",
+                        description=templates.vote_max_balance.format(
+                            new_balance=humanize_number(exc.max_balance)
+                        ),
+                    )
                 )
-            )
             return
 
-        pos = await bank.get_leaderboard_position(user)
-        maybe_weekend_bonus = (
-            _("\nAnd your week-end bonus, +{}!").format(humanize_number(weekend_amount))
-            if weekend
-            else ""
-        )
+        with span("bank", "get_leaderboard_position"):
+            pos = await bank.get_leaderboard_position(user)
+        with span("bank", "get_balance"):
+            new_balance = await bank.get_balance(user)
+        with span("config", "get_embed_color"):
+            color = await self.bot.get_embed_color(user)
         em = discord.Embed(
-            color=await self.bot.get_embed_color(user),
-            title=_("Thanks for your upvote! Here is your daily bonus."),
-            description=_(
-                " Take some {currency}. Enjoy! (+{amount} {currency}!){weekend}\n\n"
-                "You currently have {new_balance} {currency}.\n\n"
-            ).format(
-                currency=credits_name,
-                amount=humanize_number(regular_amount),
-                weekend=maybe_weekend_bonus,
-                new_balance=humanize_number(await bank.get_balance(user)),
+            color=color,
+            title=templates.vote_title,
+            description=templates.vote_description[weekend].format(
+                new_balance=humanize_number(new_balance)
             ),
         )
-        em.set_footer(
-            text=_("You are currently #{} on the global leaderboard!").format(humanize_number(pos))
-        )
+        em.set_footer(text=templates.vote_footer.format(humanize_number(pos)))
         try:
-            await user.send(embed=em)
+            with span("discord", "send"):
+                await user.send(embed=em)
         except discord.Forbidden:
             log.error("Failed to send vote notification to %s.", user.name)
 
@@ -255,7 +553,8 @@ class DblTools(commands.Cog):
             msg = _("{user.mention} `{user.id}` just voted for {bot.mention} on Top.gg!").format(
                 user=user, bot=self.bot.user
             )
-            await channel.send(msg)
+            with span("discord", "channel.send"):
+                await channel.send(msg)
 
         if global_config["support_server_role"]["role_id"]:
             guild = self.bot.get_guild(global_config["support_server_role"]["guild_id"])
@@ -263,10 +562,11 @@ class DblTools(commands.Cog):
             if not member:
                 return
             try:
-                await member.add_roles(
-                    guild.get_role(global_config["support_server_role"]["role_id"]),
-                    reason=f"Top.gg {self.bot.user.name} upvoter.",
-                )
+                with span("discord", "add_roles"):
+                    await member.add_roles(
+                        guild.get_role(global_config["support_server_role"]["role_id"]),
+                        reason=f"Top.gg {self.bot.user.name} upvoter.",
+                    )
             except discord.Forbidden:
                 await self.bot.send_to_owners(
                     _(
@@ -278,7 +578,6 @@ class DblTools(commands.Cog):
                     config["support_server_role"]["guild_id"] = None
                     config["support_server_role"]["role_id"] = None
 
-    @commands.Cog.listener()
     async def on_dbl_test(self, data: dict):
         global_config = await self.config.all()
         if global_config["votes_channel"]:
@@ -306,6 +605,234 @@ class DblTools(commands.Cog):
         )
         await ctx.send(msg)
 
+    @dblset.group()
+    async def directories(self, ctx: commands.Context):
+        """Settings for posting stats to other bot directories."""
+
+    @directories.command(name="toggle")
+    async def directories_toggle(self, ctx: commands.Context, directory: str):
+        """
+        Set if you want to send your bot stats to another bot directory.
+
+        The directory API key must be set with `[p]set api <directory> api_key <key>`.
+        Use `[p]dblset directories status` to see available directories.
+        """
+        directory = directory.lower()
+        if directory not in POSTERS or directory == TopggPoster.name:
+            return await ctx.send(
+                _("Unknown directory. Available directories: {}").format(
+                    ", ".join(f"`{name}`" for name in POSTERS if name != TopggPoster.name)
+                )
+            )
+        async with self.config.stats_posters() as stats_posters:
+            toggled = directory in stats_posters
+            if toggled:
+                stats_posters.remove(directory)
+            else:
+                stats_posters.append(directory)
+        title = POSTERS[directory].title
+        msg = (
+            _("Stats will now be sent to {}.").format(title)
+            if not toggled
+            else _("Stats will no longer be sent to {}.").format(title)
+        )
+        await ctx.send(msg)
+
+    @directories.command(name="status")
+    async def directories_status(self, ctx: commands.Context):
+        """Show the status of stats posting for each directory."""
+        config = await self.config.all()
+        enabled = set(config["stats_posters"])
+        if config["post_guild_count"]:
+            enabled.add(TopggPoster.name)
+        now = time.time()
+        rows = []
+        for name, poster in POSTERS.items():
+            status = self.stats_posters.status.get(name)
+            if status is None:
+                state = _("Never posted")
+            elif status.failures:
+                state = _("{failures} failures, next try in {delay}").format(
+                    failures=humanize_number(status.failures),
+                    delay=humanize_timedelta(seconds=max(0, int(status.next_attempt - now)))
+                    or _("a moment"),
+                )
+            else:
+                state = _("Posted {} ago").format(
+                    humanize_timedelta(seconds=int(now - status.last_success)) or _("a moment")
+                )
+            rows.append(
+                (poster.title, name, _("Enabled") if name in enabled else _("Disabled"), state)
+            )
+        msg = tabulate(rows, tablefmt="orgtbl")
+        errors_msg = "\n".join(
+            f"{POSTERS[name].title}: {status.last_error}"
+            for name, status in self.stats_posters.status.items()
+            if status.failures and status.last_error
+        )
+        if errors_msg:
+            msg += "\n\n" + errors_msg
+        for page in pagify(msg, delims=["\n"], page_length=1900):
+            await ctx.send(box(page))
+
+    @dblset.command()
+    async def health(self, ctx: commands.Context):
+        """Show the state of the connection to Top.gg API."""
+        breaker = self.topgg_breaker
+
+        def ago(timestamp):
+            if not timestamp:
+                return _("Never")
+            return _("{} ago").format(
+                humanize_timedelta(seconds=int(time.time() - timestamp)) or _("a moment")
+            )
+
+        rows = [
+            (_("State"), breaker.state),
+            (_("Consecutive failures"), humanize_number(breaker.failures)),
+            (_("Rejected calls"), humanize_number(breaker.rejected)),
+            (_("Last success"), ago(breaker.last_success)),
+            (_("Last failure"), ago(breaker.last_failure)),
+        ]
+        if breaker.last_error:
+            rows.append(
+                (
+                    _("Last error"),
+                    "{}: {}".format(type(breaker.last_error).__name__, breaker.last_error),
+                )
+            )
+        await ctx.send(box(tabulate(rows, tablefmt="orgtbl")))
+
+    @dblset.command()
+    async def tracing(self, ctx: commands.Context, sample_rate: float, threshold_ms: int = 500):
+        """
+        Trace vote, daily, payday and Top.gg commands handlers to find slow operations.
+
+        `sample_rate`: Share of handler calls to trace, between 0 (disabled) and 1 (all calls).
+        `threshold_ms`: Only keep traces of calls slower than this, in milliseconds. Defaults to 500.
+        """
+        if not 0 <= sample_rate <= 1:
+            return await ctx.send(_("The sample rate must be between 0 and 1."))
+        if threshold_ms < 0:
+            return await ctx.send(_("The threshold can't be negative."))
+        await self.config.trace_sample_rate.set(sample_rate)
+        await self.config.trace_threshold_ms.set(threshold_ms)
+        self.tracer.sample_rate = sample_rate
+        self.tracer.threshold = threshold_ms / 1000
+        self.tracer.clear()
+        if not sample_rate:
+            return await ctx.send(_("Tracing disabled."))
+        await ctx.send(
+            _("Tracing {rate:.0%} of handler calls slower than {threshold}ms.").format(
+                rate=sample_rate, threshold=humanize_number(threshold_ms)
+            )
+        )
+
+    @dblset.command()
+    async def traces(self, ctx: commands.Context):
+        """Show the slowest recent traces and where their time went."""
+        traces = self.tracer.slowest()
+        if not traces:
+            return await ctx.send(_("No slow traces have been recorded."))
+        msg = ""
+        for trace in traces:
+            breakdown = ", ".join(
+                "{}: {:.0f}ms".format(category, seconds * 1000)
+                for category, seconds in sorted(
+                    trace.breakdown().items(), key=lambda item: item[1], reverse=True
+                )
+            )
+            msg += "{name} at {date} took {duration:.0f}ms ({breakdown})\n".format(
+                name=trace.name,
+                date=datetime.fromtimestamp(trace.started).strftime("%Y-%m-%d %H:%M:%S"),
+                duration=trace.duration * 1000,
+                breakdown=breakdown,
+            )
+            for category, label, seconds in trace.spans:
+                msg += "    {:>7.1f}ms  {} {}\n".format(seconds * 1000, category, label)
+        for page in pagify(msg, delims=["\n"], page_length=1900):
+            await ctx.send(box(page))
+
+    @dblset.command()
+    async def compact(self, ctx: commands.Context):
+        """
+        Remove expired voters data now, and show how much was reclaimed.
+
+        This also runs automatically every 6 hours.
+        """
+        if self._compaction_lock.locked():
+            return await ctx.send(_("A compaction is already running, please try again later."))
+        async with ctx.typing():
+            report = await self.compact_voters()
+        await ctx.send(
+            _(
+                "Compaction done in {duration}.\n"
+                "Users scanned: **{scanned}**\n"
+                "Records cleared: **{cleared}**\n"
+                "Expired votes reset (reminders kept): **{reset}**\n"
+                "Entries removed from registry: **{registry}**"
+            ).format(
+                duration=humanize_timedelta(seconds=int(report["duration"])) or _("a moment"),
+                scanned=humanize_number(report["scanned"]),
+                cleared=humanize_number(report["cleared"]),
+                reset=humanize_number(report["reset"]),
+                registry=humanize_number(report["registry"]),
+            )
+        )
+
+    @dblset.command()
+    async def registry(self, ctx: commands.Context):
+        """
+        Set if voters should be stored in a compact registry file instead of Config.
+
+        This is meant for bots with a lot of voters. Active votes are moved over when toggling.
+        """
+        toggled = await self.config.voter_registry()
+        now = int(time.time())
+        async with ctx.typing():
+            if not toggled:
+                registry = VoterRegistry(cog_data_path(self) / "voters.bin")
+                if registry.unreadable:
+                    registry.close()
+                    return await ctx.send(
+                        _(
+                            "The existing registry file `{}` cannot be read. "
+                            "Fix or remove it before enabling the registry."
+                        ).format(registry.path)
+                    )
+                # Installed first, so votes received while migrating already go to the registry.
+                self.voter_registry = registry
+                for user_id, data in (await self.config.all_users()).items():
+                    if data.get("next_daily", 0) >= now:
+                        user_id = int(user_id)
+                        registry.set(user_id, max(registry.get(user_id), data["next_daily"]))
+                await self.config.clear_all_users()
+                for user_id in self.reminder_users:
+                    group = self.config.user_from_id(user_id)
+                    async with group.get_lock():
+                        await group.daily_reminder.set(True)
+                await self.flush_voter_registry()
+            else:
+                async with self._registry_flush_lock:
+                    registry, self.voter_registry = self.voter_registry, None
+                if registry is not None:
+                    for user_id, next_daily in registry.expiring_between(now, 2 ** 32):
+                        # Votes received since the switch are already in Config and newer.
+                        async with self.config.user_from_id(user_id).all() as user_data:
+                            if next_daily > user_data["next_daily"]:
+                                user_data["voted"] = True
+                                user_data["next_daily"] = next_daily
+                    registry.close()
+                    if registry.path.exists() and not registry.unreadable:
+                        registry.path.unlink()
+        await self.config.voter_registry.set(not toggled)
+        msg = (
+            _("Voters will now be stored in the compact registry.")
+            if not toggled
+            else _("Voters will now be stored in Config.")
+        )
+        await ctx.send(msg)
+
     @dblset.group()
     async def webhook(self, ctx: commands.Context):
         """Webhook server settings."""
@@ -334,16 +861,52 @@ class DblTools(commands.Cog):
             return await ctx.send(
                 _("You need to run `{}dblset webhook token` before.").format(ctx.prefix)
             )
+        if port is None:
+            await self.config.webhook_port.set(None)
+            await self.start_webhook(await self.config.all())
+            return await ctx.send(_("Webhook server stopped."))
         if (port < 1) or (port > 65535):
             return await ctx.send("Invalid port number. The port must be between 1 and 65535.")
         await self.config.webhook_port.set(port)
         await self.initialize()
+        if self.webhook is None:
+            return await ctx.send(
+                _("Failed to start the webhook server on port {}. Check your logs.").format(port)
+            )
         await ctx.send(
             _(
                 "Webhook server set to {} port.\nThe server is now running and ready to receive votes."
             ).format(port)
         )
 
+    @webhook.command()
+    async def backlog(self, ctx: commands.Context, high_water: int = None):
+        """
+        Show the webhook queue, or set how many votes can wait before new ones are refused.
+
+        Refused votes get a retryable answer, and Top.gg will send them again later.
+        `high_water`: Between 10 and 100000. Defaults to 500.
+        """
+        if high_water is not None:
+            if not 10 <= high_water <= 100000:
+                return await ctx.send(_("The backlog limit must be between 10 and 100000."))
+            await self.config.webhook_high_water.set(high_water)
+            if self.webhook is not None:
+                self.webhook.high_water = high_water
+            return await ctx.send(_("Webhook backlog limit set to {}.").format(high_water))
+        if self.webhook is None:
+            return await ctx.send(_("The webhook server isn't running."))
+        rows = [
+            (_("Waiting"), humanize_number(self.webhook.depth)),
+            (_("Highest backlog"), humanize_number(self.webhook.peak_depth)),
+            (_("Backlog limit"), humanize_number(self.webhook.high_water)),
+            (_("Accepted"), humanize_number(self.webhook.accepted)),
+            (_("Refused"), humanize_number(self.webhook.shed)),
+            (_("Processed"), humanize_number(self.webhook.processed)),
+            (_("Failed"), humanize_number(self.webhook.failed)),
+        ]
+        await ctx.send(box(tabulate(rows, tablefmt="orgtbl")))
+
     @webhook.command()
     async def voteschannel(self, ctx: commands.Context, *, channel: discord.TextChannel):
         """Set the channel where you will receive notifications of votes."""
@@ -420,6 +983,7 @@ class DblTools(commands.Cog):
         if amount >= await bank.get_max_balance():
             return await ctx.send(_("The amount needs to be lower than bank maximum balance."))
         await self.config.daily_rewards.set_raw("amount", value=amount)
+        self.templates.invalidate()
         await ctx.send(_("Daily rewards amount set to {}").format(amount))
 
     @dailyrewards.command()
@@ -450,11 +1014,37 @@ class DblTools(commands.Cog):
         if amount >= await bank.get_max_balance():
             return await ctx.send(_("The amount needs to be lower than bank maximum balance."))
         await self.config.daily_rewards.set_raw("weekend_bonus_amount", value=amount)
+        self.templates.invalidate()
         await ctx.send(_("Weekend bonus amount set to {}").format(amount))
 
+    @dailyrewards.command()
+    async def reminders(self, ctx: commands.Context, rate: float = None):
+        """
+        Show daily reminders status, or set how many reminders can be sent per second.
+
+        `rate`: Reminders per second, between 0.1 and 20. Defaults to 5.
+        """
+        if rate is not None:
+            if not 0.1 <= rate <= 20:
+                return await ctx.send(_("The rate must be between 0.1 and 20."))
+            await self.config.reminders_rate.set(rate)
+            self.reminder_dispatcher.set_rate(rate)
+            return await ctx.send(_("Daily reminders rate set to {} per second.").format(rate))
+        rows = [
+            (_("Opted-in users"), humanize_number(len(self.reminder_users))),
+            (_("Scheduled"), humanize_number(len(self.reminder_dispatcher))),
+            (_("Ready to send"), humanize_number(self.reminder_dispatcher.ready)),
+            (_("Sent"), humanize_number(self.reminder_dispatcher.sent)),
+            (_("Failed"), humanize_number(self.reminder_dispatcher.failed)),
+            (_("Dropped"), humanize_number(self.reminder_dispatcher.dropped)),
+            (_("Rate per second"), self.reminder_dispatcher.bucket.rate),
+        ]
+        await ctx.send(box(tabulate(rows, tablefmt="orgtbl")))
+
     @commands.command(aliases=["dblinfo"])
     @commands.bot_has_permissions(embed_links=True)
     @commands.cooldown(1, 2, commands.BucketType.user)
+    @traced("topgginfo")
     async def topgginfo(self, ctx: commands.Context, *, bot: discord.User = None):
         """
         Show information of a chosen bot on Top.gg.
@@ -468,17 +1058,26 @@ class DblTools(commands.Cog):
 
         async with ctx.typing():
             try:
-                data = await self.dbl.get_bot_info(bot.id)
+                with span("topgg", "get_bot_info"):
+                    data, fetched_at = await self.topgg_request(
+                        ("bot_info", bot.id), self.dbl.get_bot_info, bot.id
+                    )
             except (dbl.Unauthorized, dbl.UnauthorizedDetected):
                 return await ctx.send(
                     _("Failed to contact Top.gg API. A wrong token has been set by the bot owner.")
                 )
             except dbl.NotFound:
                 return await ctx.send(_("That bot isn't validated on Top.gg."))
+            except CircuitOpen:
+                return await ctx.send(
+                    _("Top.gg is currently unavailable. Please try again later.")
+                )
             except dbl.HTTPException as error:
                 log.error("Failed to fetch Top.gg API.", exc_info=error)
                 return await ctx.send(_("Failed to contact Top.gg API. Please try again later."))
 
+            with span("discord", "resolve owners"):
+                owners = await self.resolver.resolve_many([int(u) for u in data["owners"]])
             cert_emoji = (
                 "<:dblCertified:392249976639455232>"
                 if self.bot.get_guild(264445053596991498)
@@ -527,7 +1126,7 @@ class DblTools(commands.Cog):
                 ),
                 "owners": (
                     bold("{}: ").format(_("Owners") if len(data["owners"]) > 1 else _("Owner"))
-                    + ", ".join([str((self.bot.get_user(int(u)))) for u in data["owners"]])
+                    + ", ".join([name or str(u) for u, name in owners.items()])
                     + "\n"  # Thanks Slime :ablobcatsipsweats:
                 ),
                 "approval_date": (
@@ -552,17 +1151,23 @@ class DblTools(commands.Cog):
                 ),
             }
             description = [field for field in list(fields.values())]
-            em = discord.Embed(color=(await ctx.embed_colour()), description="".join(description))
+            with span("config", "embed_colour"):
+                color = await ctx.embed_colour()
+            em = discord.Embed(color=color, description="".join(description))
             em.set_author(
                 name=_("Top.gg info about {}:").format(data["username"]),
                 icon_url="https://cdn.discordapp.com/emojis/393548388664082444.gif",
             )
             em.set_thumbnail(url=bot.avatar_url_as(static_format="png"))
-            return await ctx.send(embed=em)
+            if fetched_at:
+                em.set_footer(text=self.stale_notice(fetched_at))
+            with span("discord", "send"):
+                return await ctx.send(embed=em)
 
     @commands.command()
     @commands.bot_has_permissions(embed_links=True)
     @commands.cooldown(1, 1, commands.BucketType.user)
+    @traced("dblwidget")
     async def dblwidget(self, ctx: commands.Context, *, bot: discord.User = None):
         """
         Send the widget of a chosen bot on Top.gg.
@@ -575,122 +1180,293 @@ class DblTools(commands.Cog):
             return await ctx.send(_("This is not a bot user, please try again with a bot."))
 
         async with ctx.typing():
-            try:
+
+            async def get_widget():
                 await self.dbl.get_guild_count(bot.id)
-                url = await self.dbl.get_widget_large(bot.id)
+                return await self.dbl.get_widget_large(bot.id)
+
+            try:
+                with span("topgg", "get_widget_large"):
+                    url, fetched_at = await self.topgg_request(("widget", bot.id), get_widget)
             except (dbl.Unauthorized, dbl.UnauthorizedDetected):
                 return await ctx.send(
                     _("Failed to contact Top.gg API. A wrong token has been set by the bot owner.")
                 )
             except dbl.NotFound:
                 return await ctx.send(_("That bot isn't validated on Top.gg."))
+            except CircuitOpen:
+                return await ctx.send(
+                    _("Top.gg is currently unavailable. Please try again later.")
+                )
             except dbl.HTTPException as error:
                 log.error("Failed to fetch Top.gg API.", exc_info=error)
                 return await ctx.send(_("Failed to contact Top.gg API. Please try again later."))
-            file = await download_widget(self.session, url)
+            file = None
+            # Linking the image is enough while Top.gg is unavailable, don't wait on it.
+            if not fetched_at and self.topgg_breaker.state == CircuitBreaker.CLOSED:
+                with span("topgg", "download_widget"):
+                    file = await download_widget(self.session, url)
             em = discord.Embed(
                 color=discord.Color.blurple(),
                 description=bold(_("[Top.gg Page]({})")).format(f"https://top.gg/bot/{bot.id}"),
             )
+            if fetched_at:
+                em.set_footer(text=self.stale_notice(fetched_at))
             if file:
                 filename = f"{bot.id}_topggwidget_{int(time.time())}.png"
                 em.set_image(url=f"attachment://{filename}")
-                return await ctx.send(file=discord.File(file, filename=filename), embed=em)
+                with span("discord", "send"):
+                    return await ctx.send(file=discord.File(file, filename=filename), embed=em)
             em.set_image(url=url)
-            return await ctx.send(embed=em)
+            with span("discord", "send"):
+                return await ctx.send(embed=em)
 
     @commands.command()
     @commands.bot_has_permissions(embed_links=True)
     @commands.cooldown(1, 1, commands.BucketType.user)
+    @traced("listdblvotes")
     async def listdblvotes(self, ctx: commands.Context):
         """Sends a list of the persons who voted for the bot this month."""
         try:
-            data = await self.dbl.get_bot_upvotes()
+            with span("topgg", "get_bot_upvotes"):
+                votes_count, fetched_at = await self.topgg_request("upvotes", self.get_votes_count)
         except (dbl.Unauthorized, dbl.UnauthorizedDetected):
             return await ctx.send(
                 _("Failed to contact Top.gg API. A wrong token has been set by the bot owner.")
             )
+        except CircuitOpen:
+            return await ctx.send(_("Top.gg is currently unavailable. Please try again later."))
         except (dbl.NotFound, dbl.HTTPException) as error:
             log.error("Failed to fetch Top.gg API.", exc_info=error)
             return await ctx.send(_("Failed to contact Top.gg API. Please try again later."))
-        if not data:
+        if not votes_count:
             return await ctx.send(_("Your bot hasn't received any votes yet."))
 
-        votes_count = Counter()
-        for user_data in data:
-            votes_count[user_data["id"]] += 1
+        with span("discord", "resolve voters"):
+            names = await self.resolver.resolve_many(votes_count)
+        with span("config", "embed_color"):
+            color = await ctx.embed_color()
         votes = []
         for user_id, value in votes_count.most_common():
-            user = self.bot.get_user(int(user_id))
-            votes.append((user if user else user_id, humanize_number(value)))
+            votes.append((names[user_id] or user_id, humanize_number(value)))
         msg = tabulate(votes, tablefmt="orgtbl")
         embeds = []
         pages = 1
         for page in pagify(msg, delims=["\n"], page_length=1300):
             em = discord.Embed(
-                color=await ctx.embed_color(),
+                color=color,
                 title=_("Monthly votes of {}:").format(self.bot.user),
                 description=box(page),
             )
-            em.set_footer(
-                text=_("Page {}/{}").format(
-                    humanize_number(pages), humanize_number((math.ceil(len(msg) / 1300)))
-                )
+            footer = _("Page {}/{}").format(
+                humanize_number(pages), humanize_number((math.ceil(len(msg) / 1300)))
             )
+            if fetched_at:
+                footer += " • " + self.stale_notice(fetched_at)
+            em.set_footer(text=footer)
             pages += 1
             embeds.append(em)
-        if len(embeds) > 1:
-            await menu(ctx, embeds, DEFAULT_CONTROLS)
-        else:
-            await ctx.send(embed=em)
+        with span("discord", "send"):
+            if len(embeds) > 1:
+                await menu(ctx, embeds, DEFAULT_CONTROLS)
+            else:
+                await ctx.send(embed=em)
+
+    @commands.command()
+    @commands.is_owner()
+    @commands.bot_has_permissions(attach_files=True)
+    @commands.cooldown(1, 30, commands.BucketType.default)
+    async def exportdblvotes(self, ctx: commands.Context, file_format: str = "csv"):
+        """
+        Send a file with the persons who voted for the bot this month.
+
+        `file_format`: Either `csv` or `jsonl`. Defaults to `csv`.
+        Large exports are gzipped.
+        """
+        file_format = file_format.lower()
+        if file_format not in ENCODERS:
+            return await ctx.send_help()
+        async with ctx.typing():
+            try:
+                votes_count, fetched_at = await self.topgg_request("upvotes", self.get_votes_count)
+            except (dbl.Unauthorized, dbl.UnauthorizedDetected):
+                return await ctx.send(
+                    _("Failed to contact Top.gg API. A wrong token has been set by the bot owner.")
+                )
+            except CircuitOpen:
+                return await ctx.send(
+                    _("Top.gg is currently unavailable. Please try again later.")
+                )
+            except (dbl.NotFound, dbl.HTTPException) as error:
+                log.error("Failed to fetch Top.gg API.", exc_info=error)
+                return await ctx.send(_("Failed to contact Top.gg API. Please try again later."))
+            if not votes_count:
+                return await ctx.send(_("Your bot hasn't received any votes yet."))
+
+            compress = len(votes_count) > COMPRESS_ROWS
+            names = await self.resolver.resolve_many(votes_count)
+            chunks = ENCODERS[file_format](vote_rows(votes_count, names.get))
+            fp = await self.bot.loop.run_in_executor(None, write_export, chunks, compress)
+            with fp:
+                size = fp.seek(0, 2)
+                fp.seek(0)
+                limit = ctx.guild.filesize_limit if ctx.guild else 8 * 1024 * 1024
+                if size > limit:
+                    return await ctx.send(
+                        _("The export is too large to be uploaded ({size} bytes).").format(
+                            size=humanize_number(size)
+                        )
+                    )
+                filename = "{}_votes_{}.{}{}".format(
+                    self.bot.user.id,
+                    datetime.now().strftime("%Y-%m"),
+                    file_format,
+                    ".gz" if compress else "",
+                )
+                msg = _("{count} voters this month.").format(
+                    count=humanize_number(len(votes_count))
+                )
+                if fetched_at:
+                    msg += "\n" + self.stale_notice(fetched_at)
+                await ctx.send(
+                    msg,
+                    file=discord.File(fp, filename=filename),
+                )
+
+    @commands.group()
+    @commands.is_owner()
+    async def dblstats(self, ctx: commands.Context):
+        """Votes analytics recorded from the webhook server."""
+
+    @dblstats.command(name="summary")
+    async def dblstats_summary(self, ctx: commands.Context):
+        """Show how many votes were received over the last hour, day, week and month."""
+        stats = self.vote_stats
+        now = time.time()
+        rows = [
+            (_("Last hour"), humanize_number(stats.count_since(3600, now))),
+            (_("Last 24 hours"), humanize_number(stats.count_since(86400, now))),
+            (_("Last 7 days"), humanize_number(stats.count_since(86400 * 7, now))),
+            (_("Last 30 days"), humanize_number(stats.count_since(86400 * 30, now))),
+            (_("Since recording"), humanize_number(stats.total)),
+        ]
+        await ctx.send(box(tabulate(rows, tablefmt="orgtbl")))
+
+    @dblstats.command(name="trend")
+    async def dblstats_trend(self, ctx: commands.Context, hours: int = 24):
+        """
+        Show votes per hour over the last hours.
+
+        `hours`: Number of hours to show, between 1 and 168. Defaults to 24.
+        """
+        hours = max(1, min(hours, 168))
+        now = time.time()
+        series = self.vote_stats.hourly_series(hours, now)
+        highest = max(series) or 1
+        start = datetime.fromtimestamp((int(now) // 3600 - len(series) + 1) * 3600)
+        rows = [
+            (
+                (start + timedelta(hours=i)).strftime("%a %H:00"),
+                humanize_number(count),
+                "\N{FULL BLOCK}" * math.ceil(count * 20 / highest),
+            )
+            for i, count in enumerate(series)
+        ]
+        for page in pagify(tabulate(rows, tablefmt="plain"), delims=["\n"], page_length=1900):
+            await ctx.send(box(page))
+
+    @dblstats.command(name="peaks")
+    async def dblstats_peaks(self, ctx: commands.Context):
+        """Show the busiest minute of the last day and the busiest hour of the last month."""
+        now = time.time()
+        minute, minute_count = self.vote_stats.peak_minute(now)
+        hour, hour_count = self.vote_stats.peak_hour(now)
+        if not hour_count:
+            return await ctx.send(_("No votes have been recorded yet."))
+        await ctx.send(
+            _(
+                "Busiest minute in the last 24 hours: **{minute_count}** votes at {minute}.\n"
+                "Busiest hour in the last 30 days: **{hour_count}** votes at {hour}."
+            ).format(
+                minute_count=humanize_number(minute_count),
+                minute=datetime.fromtimestamp(minute).strftime("%Y-%m-%d %H:%M"),
+                hour_count=humanize_number(hour_count),
+                hour=datetime.fromtimestamp(hour).strftime("%Y-%m-%d %H:00"),
+            )
+        )
+
+    @dblstats.command(name="weekend")
+    async def dblstats_weekend(self, ctx: commands.Context):
+        """Compare votes per hour during week-end days and other days."""
+        weekend, weekdays = self.vote_stats.weekend_effect()
+        if not weekend and not weekdays:
+            return await ctx.send(_("No votes have been recorded yet."))
+        msg = _(
+            "Average votes per hour during week-end: **{weekend:.2f}**\n"
+            "Average votes per hour during other days: **{weekdays:.2f}**"
+        ).format(weekend=weekend, weekdays=weekdays)
+        if weekdays:
+            msg += _("\nWeek-end effect: **{:+.1f}%**").format((weekend / weekdays - 1) * 100)
+        await ctx.send(msg)
 
     @commands.command()
     @commands.cooldown(1, 1, commands.BucketType.user)
+    @traced("daily")
     async def daily(self, ctx: commands.Context):
         """Claim your daily reward."""
-        config = await self.config.all()
+        with span("config", "all"):
+            config = await self.config.all()
         if not config["daily_rewards"]["toggled"]:
             return
         author = ctx.author
         cur_time = int(time.time())
-        next_daily = await self.config.user(author).next_daily()
+        with span("config", "get_next_daily"):
+            next_daily = await self.get_next_daily(author.id)
+        with span("config", "embed_requested"):
+            embed_requested = await ctx.embed_requested()
+        with span("bank", "get_currency_name"):
+            templates = await self.templates.get(self.bot.user, config["daily_rewards"], ctx.guild)
         if cur_time <= next_daily:
             delta = humanize_timedelta(seconds=next_daily - cur_time) or "1 second"
-            msg = author.mention + _(
-                " You are speeding! Slow down!\nYou have already claim your daily reward!\n"
-                "Wait **{}** for the next one."
-            ).format(delta)
-            if not await ctx.embed_requested():
-                await ctx.send(msg)
-            else:
-                em = discord.Embed(description=msg, color=discord.Color.red())
-                await ctx.send(embed=em)
+            msg = author.mention + templates.daily_speeding.format(delta)
+            with span("discord", "send"):
+                if not embed_requested:
+                    await ctx.send(msg)
+                else:
+                    em = discord.Embed(description=msg, color=discord.Color.red())
+                    await ctx.send(embed=em)
             return
-        credits_name = await bank.get_currency_name(ctx.guild)
         weekend = check_weekend() and config["daily_rewards"]["weekend_bonus_toggled"]
-        maybe_weekend_bonus = ""
-        if weekend:
-            maybe_weekend_bonus = _(" and the week-end bonus of {} {}").format(
-                humanize_number(config["daily_rewards"]["weekend_bonus_amount"]), credits_name
-            )
-        title = _(
-            "**You can upvote {bot_name} every 12 hours to earn {amount} {currency}{weekend}\n"
-            "Click here to vote. I will send you a DM with your reward when I will have received your vote.**"
-        ).format(
-            bot_name=self.bot.user.name,
-            amount=humanize_number(config["daily_rewards"]["amount"]),
-            currency=credits_name,
-            weekend=maybe_weekend_bonus,
-        )
-        vote_url = f"https://top.gg/bot/{self.bot.user.id}/vote"
-        if not await ctx.embed_requested():
-            await ctx.send(f"{title}\n\n{vote_url}")
-        else:
-            em = discord.Embed(color=discord.Color.red(), title=title, url=vote_url)
-            await ctx.send(embed=em)
+        with span("discord", "send"):
+            if not embed_requested:
+                await ctx.send(templates.daily_text[weekend])
+            else:
+                await ctx.send(embed=templates.daily_embeds[weekend])
+
+    @commands.command()
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def dailyreminder(self, ctx: commands.Context):
+        """Set wether you want to receive a DM when your daily reward is ready again."""
+        if not await self.config.daily_rewards.get_raw("toggled"):
+            return
+        author = ctx.author
+        group = self.config.user(author)
+        async with group.get_lock():
+            toggled = await group.daily_reminder()
+            await group.daily_reminder.set(not toggled)
+        if toggled:
+            self.reminder_users.discard(author.id)
+            self.reminder_dispatcher.cancel(author.id)
+            return await ctx.send(_("You will no longer receive daily reminders."))
+        self.reminder_users.add(author.id)
+        next_daily = await self.get_next_daily(author.id)
+        if next_daily > int(time.time()):
+            self.reminder_dispatcher.schedule(author.id, next_daily)
+        await ctx.send(_("I will send you a DM when your daily reward is ready again."))
 
     @guild_only_check()
     @commands.command()
+    @traced("payday")
     async def payday(self, ctx: commands.Context):
         """Get some free currency."""
         # From https://github.com/Cog-Creators/Red-DiscordBot/blob/V3/develop/redbot/cogs/economy/economy.py#L347
@@ -698,141 +1474,137 @@ class DblTools(commands.Cog):
         guild = ctx.guild
 
         cur_time = calendar.timegm(ctx.message.created_at.utctimetuple())
-        credits_name = await bank.get_currency_name(ctx.guild)
-        daily_config = await self.config.all()
+        with span("config", "all"):
+            daily_config = await self.config.all()
+        with span("bank", "get_currency_name"):
+            templates = await self.templates.get(
+                self.bot.user, daily_config["daily_rewards"], ctx.guild
+            )
         daily_message = "\n"
         if daily_config["daily_rewards"]["toggled"]:
-            next_daily = await self.config.user(author).next_daily()
+            with span("config", "get_next_daily"):
+                next_daily = await self.get_next_daily(author.id)
             if next_daily > int(time.time()):
                 delta = humanize_timedelta(seconds=next_daily - cur_time) or "1 second"
-                daily_message = _("Your daily bonus will be ready in {}.\n\n").format(delta)
+                daily_message = templates.payday_daily_wait.format(delta)
             else:
-                async with self.config.user(author).all() as config:
-                    config["voted"] = False
-                    config["next_daily"] = 0
+                with span("config", "set_next_daily"):
+                    await self.set_next_daily(author.id, 0)
                 weekend = (
                     check_weekend() and daily_config["daily_rewards"]["weekend_bonus_toggled"]
                 )
-                maybe_weekend_bonus = ""
-                if weekend:
-                    maybe_weekend_bonus = _(" and the week-end bonus of {} {}").format(
-                        humanize_number(daily_config["daily_rewards"]["weekend_bonus_amount"]),
-                        credits_name,
-                    )
-                daily_message = _(
-                    "Your daily bonus is ready! Type `{prefix}daily` to claim {daily_amount} {currency}{weekend}\n\n"
-                ).format(
-                    prefix=ctx.clean_prefix,
-                    daily_amount=daily_config["daily_rewards"]["amount"],
-                    currency=credits_name,
-                    weekend=maybe_weekend_bonus,
+                daily_message = templates.payday_daily_ready[weekend].format(
+                    prefix=ctx.clean_prefix
                 )
 
-        if await bank.is_global():  # Role payouts will not be used
+        with span("bank", "is_global"):
+            is_global = await bank.is_global()
+        if is_global:  # Role payouts will not be used
 
             # Gets the latest time the user used the command successfully and adds the global payday time
-            next_payday = (
-                await self.economy_cog.config.user(author).next_payday()
-                + await self.economy_cog.config.PAYDAY_TIME()
-            )
+            with span("config", "economy next_payday"):
+                next_payday = (
+                    await self.economy_cog.config.user(author).next_payday()
+                    + await self.economy_cog.config.PAYDAY_TIME()
+                )
             if cur_time >= next_payday:
+                with span("config", "economy PAYDAY_CREDITS"):
+                    credit_amount = await self.economy_cog.config.PAYDAY_CREDITS()
                 try:
-                    await bank.deposit_credits(
-                        author, await self.economy_cog.config.PAYDAY_CREDITS()
-                    )
+                    with span("bank", "deposit_credits"):
+                        await bank.deposit_credits(author, credit_amount)
                 except errors.BalanceTooHigh as exc:
-                    await bank.set_balance(author, exc.max_balance)
-                    await ctx.maybe_send_embed(
-                        _(
-                            "You've reached the maximum amount of {currency}!"
-                            "Please spend some more \N{GRIMACING FACE}\n\n"
-                            "You currently have {new_balance} {currency}."
-                        ).format(
-                            currency=credits_name, new_balance=humanize_number(exc.max_balance)
+                    with span("bank", "set_balance"):
+                        await bank.set_balance(author, exc.max_balance)
+                    with span("discord", "send"):
+                        await ctx.maybe_send_embed(
+                            templates.payday_max_balance[is_global].format(
+                                new_balance=humanize_number(exc.max_balance)
+                            )
                         )
-                    )
                     return
                 # Sets the current time as the latest payday
-                await self.economy_cog.config.user(author).next_payday.set(cur_time)
+                with span("config", "economy next_payday.set"):
+                    await self.economy_cog.config.user(author).next_payday.set(cur_time)
 
-                pos = await bank.get_leaderboard_position(author)
-                await ctx.maybe_send_embed(
-                    _(
-                        "{author.mention} Here, take some {currency}. "
-                        "Enjoy! (+{amount} {currency}!)\n\n"
-                        "You currently have {new_balance} {currency}.\n{daily_message}"
-                        "You are currently #{pos} on the global leaderboard!"
-                    ).format(
-                        author=author,
-                        currency=credits_name,
-                        amount=humanize_number(await self.economy_cog.config.PAYDAY_CREDITS()),
-                        new_balance=humanize_number(await bank.get_balance(author)),
-                        daily_message=daily_message,
-                        pos=humanize_number(pos) if pos else pos,
+                with span("bank", "get_leaderboard_position"):
+                    pos = await bank.get_leaderboard_position(author)
+                with span("bank", "get_balance"):
+                    new_balance = await bank.get_balance(author)
+                with span("discord", "send"):
+                    await ctx.maybe_send_embed(
+                        templates.payday_success.format(
+                            mention=author.mention,
+                            amount=humanize_number(credit_amount),
+                            new_balance=humanize_number(new_balance),
+                            daily_message=daily_message,
+                            pos=humanize_number(pos) if pos else pos,
+                        )
                     )
-                )
 
             else:
                 dtime = self.economy_cog.display_time(next_payday - cur_time)
-                await ctx.maybe_send_embed(
-                    _(
-                        "{author.mention} You are speeding! Slow down!\nYour next payday will be ready in **{time}**.\n\n{daily_message}"
-                    ).format(author=author, time=dtime, daily_message=daily_message)
-                )
+                with span("discord", "send"):
+                    await ctx.maybe_send_embed(
+                        templates.payday_speeding.format(
+                            mention=author.mention, time=dtime, daily_message=daily_message
+                        )
+                    )
         else:
 
             # Gets the users latest successfully payday and adds the guilds payday time
-            next_payday = (
-                await self.economy_cog.config.member(author).next_payday()
-                + await self.economy_cog.config.guild(guild).PAYDAY_TIME()
-            )
+            with span("config", "economy next_payday"):
+                next_payday = (
+                    await self.economy_cog.config.member(author).next_payday()
+                    + await self.economy_cog.config.guild(guild).PAYDAY_TIME()
+                )
             if cur_time >= next_payday:
-                credit_amount = await self.economy_cog.config.guild(guild).PAYDAY_CREDITS()
-                for role in author.roles:
-                    role_credits = await self.economy_cog.config.role(
-                        role
-                    ).PAYDAY_CREDITS()  # Nice variable name
-                    if role_credits > credit_amount:
-                        credit_amount = role_credits
+                with span("config", "economy PAYDAY_CREDITS"):
+                    credit_amount = await self.economy_cog.config.guild(guild).PAYDAY_CREDITS()
+                    for role in author.roles:
+                        role_credits = await self.economy_cog.config.role(
+                            role
+                        ).PAYDAY_CREDITS()  # Nice variable name
+                        if role_credits > credit_amount:
+                            credit_amount = role_credits
                 try:
-                    await bank.deposit_credits(author, credit_amount)
+                    with span("bank", "deposit_credits"):
+                        await bank.deposit_credits(author, credit_amount)
                 except errors.BalanceTooHigh as exc:
-                    await bank.set_balance(author, exc.max_balance)
-                    await ctx.maybe_send_embed(
-                        _(
-                            "You've reached the maximum amount of {currency}! "
-                            "Please spend some more \N{GRIMACING FACE}\n\n"
-                            "You currently have {new_balance} {currency}."
-                        ).format(
-                            currency=credits_name, new_balance=humanize_number(exc.max_balance)
+                    with span("bank", "set_balance"):
+                        await bank.set_balance(author, exc.max_balance)
+                    with span("discord", "send"):
+                        await ctx.maybe_send_embed(
+                            templates.payday_max_balance[is_global].format(
+                                new_balance=humanize_number(exc.max_balance)
+                            )
                         )
-                    )
                     return
 
                 # Sets the latest payday time to the current time
                 next_payday = cur_time
 
-                await self.economy_cog.config.member(author).next_payday.set(next_payday)
-                pos = await bank.get_leaderboard_position(author)
-                await ctx.maybe_send_embed(
-                    _(
-                        "{author.mention} Here, take some {currency}. "
-                        "Enjoy! (+{amount} {currency}!)\n\n"
-                        "You currently have {new_balance} {currency}.\n{daily_message}"
-                        "You are currently #{pos} on the global leaderboard!"
-                    ).format(
-                        author=author,
-                        currency=credits_name,
-                        amount=humanize_number(credit_amount),
-                        new_balance=humanize_number(await bank.get_balance(author)),
-                        daily_message=daily_message,
-                        pos=humanize_number(pos) if pos else pos,
+                with span("config", "economy next_payday.set"):
+                    await self.economy_cog.config.member(author).next_payday.set(next_payday)
+                with span("bank", "get_leaderboard_position"):
+                    pos = await bank.get_leaderboard_position(author)
+                with span("bank", "get_balance"):
+                    new_balance = await bank.get_balance(author)
+                with span("discord", "send"):
+                    await ctx.maybe_send_embed(
+                        templates.payday_success.format(
+                            mention=author.mention,
+                            amount=humanize_number(credit_amount),
+                            new_balance=humanize_number(new_balance),
+                            daily_message=daily_message,
+                            pos=humanize_number(pos) if pos else pos,
+                        )
                     )
-                )
             else:
                 dtime = self.economy_cog.display_time(next_payday - cur_time)
-                await ctx.maybe_send_embed(
-                    _(
-                        "{author.mention} You are speeding! Slow down!\nYour next payday will be ready in **{time}**.\n\n{daily_message}"
-                    ).format(author=author, time=dtime, daily_message=daily_message)
-                )
+                with span("discord", "send"):
+                    await ctx.maybe_send_embed(
+                        templates.payday_speeding.format(
+                            mention=author.mention, time=dtime, daily_message=daily_message
+                        )
+                    )
@@ -0,0 +1,61 @@
+import io
+import csv
+import gzip
+import json
+from collections import Counter
+from tempfile import SpooledTemporaryFile
+from typing import Callable, IO, Iterable, Iterator, Optional, Tuple
+
+Row = Tuple[int, str, int]
+
+# Spool exports in memory up to this size, then on disk.
+SPOOL_SIZE = 1024 * 1024
+# Exports with more rows than this are gzipped while being written.
+COMPRESS_ROWS = 5000
+
+
+def count_votes(upvotes: Iterable[dict]) -> Counter:
+    """Count votes per user ID from ``get_bot_upvotes()`` data."""
+    return Counter(int(user_data["id"]) for user_data in upvotes)
+
+
+def vote_rows(votes_count: Counter, get_name: Callable[[int], Optional[str]]) -> Iterator[Row]:
+    """Yield ``(user_id, name, count)`` rows, most votes first."""
+    for user_id, count in votes_count.most_common():
+        yield user_id, get_name(user_id) or "", count
+
+
+def encode_csv(rows: Iterable[Row]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("user_id", "name", "votes"))
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def encode_jsonl(rows: Iterable[Row]) -> Iterator[bytes]:
+    for user_id, name, count in rows:
+        yield (json.dumps({"user_id": str(user_id), "name": name, "votes": count}) + "\n").encode(
+            "utf-8"
+        )
+
+
+ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl}
+
+
+def write_export(chunks: Iterable[bytes], compress: bool) -> IO[bytes]:
+    """Write ``chunks`` to a spooled temporary file, gzipping them if ``compress`` is set.
+
+    The returned file is positioned at its start, ready to be uploaded.
+    """
+    fp = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    out = gzip.GzipFile(fileobj=fp, mode="wb") if compress else fp
+    for chunk in chunks:
+        out.write(chunk)
+    if compress:
+        out.close()
+    fp.seek(0)
+    return fp
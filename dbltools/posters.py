@@ -0,0 +1,188 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from .breaker import CircuitBreaker, CircuitOpen
+
+log = logging.getLogger("red.predacogs.DblTools.posters")
+
+
+class PostRejected(aiohttp.ClientResponseError):
+    """The directory answered with a 4xx error other than 429, so it is up but refused the post."""
+
+
+class StatsPoster:
+    """Post guild and shard counts to one bot directory.
+
+    Subclasses set ``name`` (also the shared API tokens service name), ``base_url``, ``path``
+    and build the payload. ``base_url`` can be overridden, to point a poster to a local server.
+    """
+
+    name: str = ""
+    title: str = ""
+    base_url: str = ""
+    path: str = "/bots/{bot_id}/stats"
+
+    def __init__(
+        self,
+        bot_id: int,
+        token: str,
+        *,
+        base_url: Optional[str] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.bot_id = bot_id
+        self.token = token
+        self.breaker = breaker
+        if base_url is not None:
+            self.base_url = base_url.rstrip("/")
+
+    @property
+    def url(self) -> str:
+        return self.base_url + self.path.format(bot_id=self.bot_id)
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": self.token}
+
+    def payload(self, guild_count: int, shard_count: int) -> dict:
+        raise NotImplementedError
+
+    async def post(self, session: aiohttp.ClientSession, guild_count: int, shard_count: int):
+        async with session.post(
+            self.url, headers=self.headers(), json=self.payload(guild_count, shard_count)
+        ) as resp:
+            if resp.status >= 400:
+                if resp.status < 500 and resp.status != 429:
+                    error = PostRejected
+                else:
+                    error = aiohttp.ClientResponseError
+                raise error(
+                    resp.request_info, resp.history, status=resp.status, message=resp.reason
+                )
+
+
+class TopggPoster(StatsPoster):
+    name = "dbl"
+    title = "Top.gg"
+    base_url = "https://top.gg/api"
+
+    def payload(self, guild_count: int, shard_count: int) -> dict:
+        return {"server_count": guild_count, "shard_count": shard_count}
+
+
+class DiscordBotsGGPoster(StatsPoster):
+    name = "discordbotsgg"
+    title = "discord.bots.gg"
+    base_url = "https://discord.bots.gg/api/v1"
+
+    def payload(self, guild_count: int, shard_count: int) -> dict:
+        return {"guildCount": guild_count, "shardCount": shard_count}
+
+
+class DiscordBotListPoster(StatsPoster):
+    name = "discordbotlist"
+    title = "discordbotlist.com"
+    base_url = "https://discordbotlist.com/api/v1"
+
+    def payload(self, guild_count: int, shard_count: int) -> dict:
+        return {"guilds": guild_count}
+
+
+class BotsOnDiscordPoster(StatsPoster):
+    name = "botsondiscord"
+    title = "bots.ondiscord.xyz"
+    base_url = "https://bots.ondiscord.xyz/bot-api"
+    path = "/bots/{bot_id}/guilds"
+
+    def payload(self, guild_count: int, shard_count: int) -> dict:
+        return {"guildCount": guild_count}
+
+
+POSTERS = {
+    poster.name: poster
+    for poster in (TopggPoster, DiscordBotsGGPoster, DiscordBotListPoster, BotsOnDiscordPoster)
+}
+
+
+class PosterStatus:
+    __slots__ = ("last_success", "last_failure", "last_error", "failures", "next_attempt")
+
+    def __init__(self):
+        self.last_success = 0.0
+        self.last_failure = 0.0
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self.next_attempt = 0.0
+
+
+class StatsPosterManager:
+    """Post stats to several directories concurrently.
+
+    Each target gets ``timeout`` seconds. A failing target is retried after an exponential
+    backoff, starting at ``min_backoff`` and capped to ``max_backoff`` seconds, while the other
+    targets keep being posted to as usual.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        timeout: int = 15,
+        min_backoff: int = 300,
+        max_backoff: int = 6 * 3600,
+    ):
+        self.session = session
+        self.timeout = timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.status: Dict[str, PosterStatus] = {}
+
+    async def _post(self, poster: StatsPoster, guild_count: int, shard_count: int) -> bool:
+        status = self.status.setdefault(poster.name, PosterStatus())
+        now = time.time()
+        if now < status.next_attempt:
+            return False
+        try:
+            if poster.breaker is not None:
+                await poster.breaker.call(
+                    None, poster.post, self.session, guild_count, shard_count
+                )
+            else:
+                await asyncio.wait_for(
+                    poster.post(self.session, guild_count, shard_count), self.timeout
+                )
+        except asyncio.CancelledError:
+            raise
+        except CircuitOpen:
+            # The breaker already tracks when to try again.
+            return False
+        except Exception as error:
+            status.failures += 1
+            status.last_failure = now
+            status.last_error = "{}: {}".format(type(error).__name__, error)
+            backoff = min(self.max_backoff, self.min_backoff * 2 ** (status.failures - 1))
+            status.next_attempt = now + backoff
+            log.warning(
+                "Failed to post stats to %s, retrying in %s seconds. %s",
+                poster.title,
+                backoff,
+                status.last_error,
+            )
+            return False
+        status.failures = 0
+        status.last_success = now
+        status.next_attempt = 0.0
+        return True
+
+    async def post_all(
+        self, posters: Iterable[StatsPoster], guild_count: int, shard_count: int
+    ) -> List[Tuple[StatsPoster, bool]]:
+        """Post to every target at once. Returns whether each post went through."""
+        posters = list(posters)
+        results = await asyncio.gather(
+            *(self._post(poster, guild_count, shard_count) for poster in posters)
+        )
+        return list(zip(posters, results))
@@ -0,0 +1,255 @@
+import os
+import mmap
+import struct
+import logging
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import uuid4
+
+log = logging.getLogger("red.predacogs.DblTools.registry")
+
+
+class RegistryUnreadable(Exception):
+    """The registry file exists but could not be read, so it must not be overwritten."""
+
+
+class _ExpiryView(Sequence):
+    """Expiries in ascending order, read through the ``order`` index, so ``bisect`` can run on it."""
+
+    def __init__(self, expiries: Sequence, order: Sequence):
+        self.expiries = expiries
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        return self.expiries[self.order[index]]
+
+
+class VoterRegistry:
+    """Compact store of voters and the timestamp until which their vote is valid.
+
+    The file holds three typed arrays: user IDs sorted ascending (``Q``), their expiry
+    timestamps (``I``), and the positions of the IDs sorted by expiry (``I``). It is memory
+    mapped on load, so opening it does not depend on the number of voters.
+
+    Writes go to an in-memory overlay and are merged into the file by :meth:`flush`, or by
+    :meth:`begin_flush`, :meth:`write_flush` and :meth:`end_flush` when the merge should run
+    in an executor.
+
+    If the file exists but cannot be read, the registry starts empty and ``unreadable`` is set.
+    Flushes then raise :class:`RegistryUnreadable` instead of replacing the file, and changes
+    stay in memory.
+    """
+
+    _MAGIC = b"DVR1"
+    _HEADER = struct.Struct("<4sIQ")  # magic, version, number of voters
+    _VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.pending: Dict[int, int] = {}
+        self._flushing: Dict[int, int] = {}
+        self._flush_path: Optional[Path] = None
+        self.unreadable = False
+        self._file = None
+        self._mmap = None
+        self._views = []
+        self.ids: Sequence = ()
+        self.expiries: Sequence = ()
+        self.order: Sequence = ()
+        self._open()
+
+    def __len__(self):
+        count = len(self.ids)
+        for user_id, expiry in self._overlay().items():
+            known = self._index(user_id) is not None
+            count += bool(expiry) - known
+        return count
+
+    def _open(self):
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self._HEADER.size:
+            self._set_unreadable("file is too short")
+            return
+        self._file = self.path.open("rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = self._HEADER.unpack_from(self._mmap)
+        if (
+            magic != self._MAGIC
+            or version != self._VERSION
+            or size != self._HEADER.size + count * 16
+        ):
+            self._close()
+            self._set_unreadable("unknown format or size mismatch")
+            return
+        view = memoryview(self._mmap)
+        offset = self._HEADER.size
+        ids = view[offset : offset + count * 8].cast("Q")
+        offset += count * 8
+        expiries = view[offset : offset + count * 4].cast("I")
+        offset += count * 4
+        order = view[offset : offset + count * 4].cast("I")
+        self._views = [view, ids, expiries, order]
+        self.ids, self.expiries, self.order = ids, expiries, order
+
+    def _set_unreadable(self, reason: str):
+        self.unreadable = True
+        log.error(
+            "Voters registry %s is unreadable (%s). It will be left untouched and new votes kept"
+            " in memory until it is fixed or removed.",
+            self.path,
+            reason,
+        )
+
+    def _close(self):
+        self.ids, self.expiries, self.order = (), (), ()
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Unmap the file. Pending changes are not written, flush them first."""
+        self._close()
+
+    def _index(self, user_id: int) -> Optional[int]:
+        index = bisect_left(self.ids, user_id)
+        if index < len(self.ids) and self.ids[index] == user_id:
+            return index
+        return None
+
+    def _overlay(self) -> Dict[int, int]:
+        if not self._flushing:
+            return self.pending
+        return {**self._flushing, **self.pending}
+
+    def get(self, user_id: int) -> int:
+        """Return the expiry timestamp of ``user_id``, or ``0`` if unknown."""
+        if user_id in self.pending:
+            return self.pending[user_id]
+        if user_id in self._flushing:
+            return self._flushing[user_id]
+        index = self._index(user_id)
+        return self.expiries[index] if index is not None else 0
+
+    def set(self, user_id: int, expiry: int):
+        """Set the expiry timestamp of ``user_id``. ``0`` removes the voter on next flush."""
+        self.pending[user_id] = int(expiry)
+
+    def expiring_between(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """Yield ``(user_id, expiry)`` for voters whose expiry is in ``[start, end)``."""
+        overlay = self._overlay()
+        view = _ExpiryView(self.expiries, self.order)
+        for position in range(bisect_left(view, start), bisect_left(view, end)):
+            index = self.order[position]
+            user_id = self.ids[index]
+            if user_id not in overlay:
+                yield user_id, self.expiries[index]
+        for user_id, expiry in overlay.items():
+            if expiry and start <= expiry < end:
+                yield user_id, expiry
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        """Yield ``(user_id, expiry)`` for every known voter."""
+        overlay = self._overlay()
+        for index, user_id in enumerate(self.ids):
+            if user_id not in overlay:
+                yield user_id, self.expiries[index]
+        for user_id, expiry in overlay.items():
+            if expiry:
+                yield user_id, expiry
+
+    def begin_flush(self):
+        """Freeze pending changes so :meth:`write_flush` can merge them.
+
+        Changes made after this call are kept for the next flush.
+        """
+        self._flushing = {**self._flushing, **self.pending}
+        self.pending = {}
+        self._flush_path = self.path.with_name("{}.{}.tmp".format(self.path.stem, uuid4().hex))
+
+    def write_flush(self, prune_before: int = 0) -> int:
+        """Write the frozen changes merged with the file to a temporary file.
+
+        Voters expired before ``prune_before`` are dropped. This does not touch the mapped
+        file, so it can run in an executor while lookups continue. Each flush writes its own
+        temporary file.
+        Returns the number of voters dropped.
+        """
+        if self.unreadable:
+            raise RegistryUnreadable(self.path)
+        ids, expiries = array("Q"), array("I")
+        updates = sorted(self._flushing.items())
+        pos = 0
+        dropped = 0
+
+        def append(user_id, expiry):
+            nonlocal dropped
+            if expiry and expiry >= prune_before:
+                ids.append(user_id)
+                expiries.append(expiry)
+            else:
+                dropped += 1
+
+        for index, user_id in enumerate(self.ids):
+            while pos < len(updates) and updates[pos][0] < user_id:
+                if updates[pos][1]:
+                    append(*updates[pos])
+                pos += 1
+            if pos < len(updates) and updates[pos][0] == user_id:
+                append(*updates[pos])
+                pos += 1
+            else:
+                append(user_id, self.expiries[index])
+        for user_id, expiry in updates[pos:]:
+            if expiry:
+                append(user_id, expiry)
+
+        order = array("I", sorted(range(len(ids)), key=expiries.__getitem__))
+        with self._flush_path.open("wb") as fp:
+            fp.write(self._HEADER.pack(self._MAGIC, self._VERSION, len(ids)))
+            ids.tofile(fp)
+            expiries.tofile(fp)
+            order.tofile(fp)
+        return dropped
+
+    def end_flush(self, success: bool = True):
+        """Swap the file written by :meth:`write_flush` in, or give the changes back on failure."""
+        flush_path, self._flush_path = self._flush_path, None
+        if not success:
+            self.pending = {**self._flushing, **self.pending}
+            self._flushing = {}
+            if flush_path is not None and flush_path.exists():
+                flush_path.unlink()
+            return
+        self._close()
+        os.replace(flush_path, self.path)
+        self._flushing = {}
+        self._open()
+
+    def flush(self, prune_before: int = 0) -> int:
+        """Merge pending changes into the file, dropping voters expired before ``prune_before``.
+
+        Returns the number of voters dropped from the file.
+        """
+        self.begin_flush()
+        try:
+            dropped = self.write_flush(prune_before)
+        except BaseException:
+            self.end_flush(success=False)
+            raise
+        self.end_flush()
+        return dropped
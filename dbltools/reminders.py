@@ -0,0 +1,173 @@
+import time
+import heapq
+import asyncio
+import logging
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("red.predacogs.DblTools.reminders")
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second on average, with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: int = 1) -> int:
+        """Wait until at least one token is available, then take up to ``amount`` of them.
+
+        Returns the number of tokens taken.
+        """
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        taken = min(amount, int(self.tokens))
+        self.tokens -= taken
+        return taken
+
+
+class ReminderDispatcher:
+    """Send reminders when their deadline passes, under a global rate budget.
+
+    Reminders wait in a heap ordered by deadline. Due ones move to a ready heap ordered by
+    priority (lower first), then deadline, and are sent in batches as tokens are available.
+    Under backlog, reminders later than ``max_lateness`` seconds are dropped, and the ready
+    heap is trimmed to ``max_ready`` entries by dropping the lowest priority ones.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int], Awaitable[bool]],
+        *,
+        rate: float = 5.0,
+        batch_size: int = 25,
+        max_ready: int = 10000,
+        max_lateness: int = 3600,
+    ):
+        self.send = send
+        self.bucket = TokenBucket(rate, batch_size)
+        self.batch_size = batch_size
+        self.max_ready = max_ready
+        self.max_lateness = max_lateness
+
+        self._scheduled: Dict[int, Tuple[int, int]] = {}  # user ID -> (deadline, sequence)
+        self._waiting: List[Tuple[int, int, int, int]] = []  # (deadline, priority, seq, user)
+        self._ready: List[Tuple[int, int, int, int]] = []  # (priority, deadline, seq, user)
+        self._sequence = count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._scheduled)
+
+    @property
+    def ready(self) -> int:
+        return len(self._ready)
+
+    def set_rate(self, rate: float):
+        self.bucket.rate = rate
+
+    def schedule(self, user_id: int, deadline: int, priority: int = 0):
+        """Remind ``user_id`` at ``deadline``, replacing any reminder already scheduled."""
+        sequence = next(self._sequence)
+        self._scheduled[user_id] = (deadline, sequence)
+        heapq.heappush(self._waiting, (deadline, priority, sequence, user_id))
+        if self._waiting[0][2] == sequence:
+            self._wakeup.set()
+
+    def cancel(self, user_id: int):
+        # Heap entries are skipped lazily once their user is no longer scheduled.
+        self._scheduled.pop(user_id, None)
+
+    def _is_current(self, user_id: int, sequence: int) -> bool:
+        scheduled = self._scheduled.get(user_id)
+        return scheduled is not None and scheduled[1] == sequence
+
+    def _drop(self, user_id: int):
+        self._scheduled.pop(user_id, None)
+        self.dropped += 1
+
+    def _collect_due(self, now: int):
+        while self._waiting and self._waiting[0][0] <= now:
+            deadline, priority, sequence, user_id = heapq.heappop(self._waiting)
+            if not self._is_current(user_id, sequence):
+                continue
+            if now - deadline > self.max_lateness:
+                self._drop(user_id)
+                continue
+            heapq.heappush(self._ready, (priority, deadline, sequence, user_id))
+        if len(self._ready) > self.max_ready:
+            keep = heapq.nsmallest(self.max_ready, self._ready)
+            for _, _, sequence, user_id in set(self._ready) - set(keep):
+                if self._is_current(user_id, sequence):
+                    self._drop(user_id)
+            heapq.heapify(keep)
+            self._ready = keep
+
+    def _next_batch(self, size: int) -> List[int]:
+        batch = []
+        while self._ready and len(batch) < size:
+            _, _, sequence, user_id = heapq.heappop(self._ready)
+            if self._is_current(user_id, sequence):
+                del self._scheduled[user_id]
+                batch.append(user_id)
+        return batch
+
+    async def _send(self, user_id: int):
+        try:
+            success = await self.send(user_id)
+        except Exception as error:
+            log.exception("Failed to send daily reminder to %s.", user_id, exc_info=error)
+            success = False
+        if success:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+    async def _wait(self):
+        self._wakeup.clear()
+        if self._waiting:
+            timeout = max(0, self._waiting[0][0] - time.time())
+        else:
+            timeout = None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self):
+        while True:
+            self._collect_due(int(time.time()))
+            if not self._ready:
+                await self._wait()
+                continue
+            tokens = await self.bucket.acquire(self.batch_size)
+            # Drop rules may have emptied the ready heap while waiting for tokens.
+            self._collect_due(int(time.time()))
+            batch = self._next_batch(tokens)
+            self.bucket.tokens += tokens - len(batch)
+            if batch:
+                await asyncio.gather(*(self._send(user_id) for user_id in batch))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
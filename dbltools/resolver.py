@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import discord
+from redbot.core.bot import Red
+
+log = logging.getLogger("red.predacogs.DblTools.resolver")
+
+
+class UserResolver:
+    """Resolve user IDs to names, from the bot cache first, then a persistent LRU, then the API.
+
+    API lookups are limited to ``max_fetches`` per call and ``concurrency`` at a time, and
+    stop for the rest of the call once Discord rate limits them. Only names fetched from the
+    API are stored, users in the bot cache are looked up there each time.
+    """
+
+    def __init__(
+        self,
+        bot: Red,
+        path: Path,
+        *,
+        ttl: int = 7 * 86400,
+        max_size: int = 100000,
+        concurrency: int = 4,
+        max_fetches: int = 50,
+    ):
+        self.bot = bot
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_fetches = max_fetches
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._save_lock = asyncio.Lock()
+        self._cache: "OrderedDict[int, list]" = OrderedDict()  # user ID -> [name, expires at]
+        self.dirty = False
+        self.load()
+
+    def _store(self, user_id: int, name: Optional[str]):
+        self._cache[user_id] = [name, int(time.time()) + self.ttl]
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        self.dirty = True
+
+    def get_cached(self, user_id: int) -> Optional[str]:
+        """Return the name of ``user_id`` without any API call, or ``None`` if unknown."""
+        user = self.bot.get_user(user_id)
+        if user:
+            return str(user)
+        entry = self._cache.get(user_id)
+        if entry is None or entry[1] < time.time():
+            return None
+        self._cache.move_to_end(user_id)
+        return entry[0]
+
+    async def _fetch(self, user_id: int) -> bool:
+        """Fetch and store the name of ``user_id``. Returns ``False`` when rate limited."""
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                self._store(user_id, None)
+            except discord.HTTPException as error:
+                if error.status == 429:
+                    return False
+                log.error("Failed to fetch user %s.", user_id, exc_info=error)
+            else:
+                self._store(user_id, str(user))
+        return True
+
+    async def resolve_many(
+        self, user_ids: Iterable[int], max_fetches: int = None
+    ) -> Dict[int, Optional[str]]:
+        """Return a mapping of user IDs to names, ``None`` for users that couldn't be resolved."""
+        if max_fetches is None:
+            max_fetches = self.max_fetches
+        names, misses = {}, []
+        now = time.time()
+        for user_id in user_ids:
+            names[user_id] = self.get_cached(user_id)
+            if names[user_id] is None:
+                entry = self._cache.get(user_id)
+                if entry is None or entry[1] < now:
+                    misses.append(user_id)
+        misses = misses[:max_fetches]
+        for start in range(0, len(misses), self.concurrency):
+            chunk = misses[start : start + self.concurrency]
+            if not all(await asyncio.gather(*(self._fetch(user_id) for user_id in chunk))):
+                log.warning("Rate limited while fetching users, skipping remaining lookups.")
+                break
+        for user_id in misses:
+            entry = self._cache.get(user_id)
+            names[user_id] = entry[0] if entry else None
+        return names
+
+    async def resolve(self, user_id: int) -> Optional[str]:
+        return (await self.resolve_many([user_id]))[user_id]
+
+    def forget(self, user_id: int):
+        if self._cache.pop(user_id, None) is not None:
+            self.dirty = True
+
+    def load(self):
+        try:
+            with self.path.open() as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for user_id, (name, expires) in sorted(data.items(), key=lambda item: item[1][1]):
+            if expires > now:
+                self._cache[int(user_id)] = [name, expires]
+
+    def _write(self, entries: list):
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w") as fp:
+            json.dump({str(user_id): entry for user_id, entry in entries}, fp)
+        os.replace(tmp, self.path)
+
+    async def save(self):
+        """Write the cache to disk. Encoding and writing run in an executor."""
+        async with self._save_lock:
+            # Entries are replaced rather than mutated, so a shallow copy is a stable snapshot.
+            entries = list(self._cache.items())
+            self.dirty = False
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self._write, entries)
+            except BaseException:
+                self.dirty = True
+                raise
@@ -0,0 +1,181 @@
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+import discord
+from redbot.core import bank
+from redbot.core.i18n import Translator, get_locale
+from redbot.core.utils.chat_formatting import humanize_number
+
+_ = Translator("DblTools", __file__)
+
+
+def _escape(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+# Keeps ``{author.mention}`` as a ``{mention}`` field while the rest is prefilled.
+_AUTHOR = SimpleNamespace(mention="{mention}")
+
+
+class MessageTemplates:
+    """Vote, daily and payday messages with everything but per-user values filled in.
+
+    Lists indexed by a boolean are the regular and week-end bonus variants. Remaining fields
+    are filled with ``str.format``.
+    """
+
+    def __init__(
+        self, *, bot_user: discord.ClientUser, currency: str, amount: int, weekend_amount: int
+    ):
+        # Titles are final, the other templates are formatted again and need escaped values.
+        raw_currency = currency
+        raw_weekend_bonus = _(" and the week-end bonus of {} {}").format(
+            humanize_number(weekend_amount), currency
+        )
+        currency = _escape(raw_currency)
+        weekend_bonus = _escape(raw_weekend_bonus)
+        vote_weekend_bonus = _("\nAnd your week-end bonus, +{}!").format(
+            humanize_number(weekend_amount)
+        )
+
+        # Vote DM, filled with new_balance.
+        self.vote_title = _("Thanks for your upvote! Here is your daily bonus.")
+        self.vote_description = [
+            _(
+                " Take some {currency}. Enjoy! (+{amount} {currency}!){weekend}\n\n"
+                "You currently have {new_balance} {currency}.\n\n"
+            ).format(
+                currency=currency,
+                amount=humanize_number(amount),
+                weekend=weekend,
+                new_balance="{new_balance}",
+            )
+            for weekend in ("", vote_weekend_bonus)
+        ]
+        self.vote_footer = _("You are currently #{} on the global leaderboard!")
+        self.vote_max_balance = _(
+            "However, you've reached the maximum amount of {currency}! (**{new_balance}**) "
+            "Please spend some more \N{GRIMACING FACE}\n\n"
+            "You currently have {new_balance} {currency}."
+        ).format(currency=currency, new_balance="{new_balance}")
+
+        # Daily command.
+        self.vote_url = f"https://top.gg/bot/{bot_user.id}/vote"
+        self.daily_title = [
+            _(
+                "**You can upvote {bot_name} every 12 hours to earn {amount} {currency}{weekend}\n"
+                "Click here to vote. I will send you a DM with your reward when I will have received your vote.**"
+            ).format(
+                bot_name=bot_user.name,
+                amount=humanize_number(amount),
+                currency=raw_currency,
+                weekend=weekend,
+            )
+            for weekend in ("", raw_weekend_bonus)
+        ]
+        self.daily_text = ["{}\n\n{}".format(title, self.vote_url) for title in self.daily_title]
+        self.daily_embeds = [
+            discord.Embed(color=discord.Color.red(), title=title, url=self.vote_url)
+            for title in self.daily_title
+        ]
+        self.daily_speeding = _(
+            " You are speeding! Slow down!\nYou have already claim your daily reward!\n"
+            "Wait **{}** for the next one."
+        )
+
+        # Payday command, filled with prefix, or mention, amount, new_balance, daily_message and pos.
+        self.payday_daily_wait = _("Your daily bonus will be ready in {}.\n\n")
+        self.payday_daily_ready = [
+            _(
+                "Your daily bonus is ready! Type `{prefix}daily` to claim {daily_amount} {currency}{weekend}\n\n"
+            ).format(prefix="{prefix}", daily_amount=amount, currency=currency, weekend=weekend)
+            for weekend in ("", weekend_bonus)
+        ]
+        self.payday_success = _(
+            "{author.mention} Here, take some {currency}. "
+            "Enjoy! (+{amount} {currency}!)\n\n"
+            "You currently have {new_balance} {currency}.\n{daily_message}"
+            "You are currently #{pos} on the global leaderboard!"
+        ).format(
+            author=_AUTHOR,
+            currency=currency,
+            amount="{amount}",
+            new_balance="{new_balance}",
+            daily_message="{daily_message}",
+            pos="{pos}",
+        )
+        self.payday_speeding = _(
+            "{author.mention} You are speeding! Slow down!\nYour next payday will be ready in **{time}**.\n\n{daily_message}"
+        ).format(author=_AUTHOR, time="{time}", daily_message="{daily_message}")
+        # Both variants exist upstream, the global one lacks a space.
+        self.payday_max_balance = {
+            True: _(
+                "You've reached the maximum amount of {currency}!"
+                "Please spend some more \N{GRIMACING FACE}\n\n"
+                "You currently have {new_balance} {currency}."
+            ).format(currency=currency, new_balance="{new_balance}"),
+            False: _(
+                "You've reached the maximum amount of {currency}! "
+                "Please spend some more \N{GRIMACING FACE}\n\n"
+                "You currently have {new_balance} {currency}."
+            ).format(currency=currency, new_balance="{new_balance}"),
+        }
+
+
+class TemplateCache:
+    """Build :class:`MessageTemplates` once per locale, currency and daily rewards settings.
+
+    Settings and the locale are part of the cache key, so changing them picks new templates
+    on the next call. Currency names are read from the bank at most every ``currency_ttl``
+    seconds per guild, or again after :meth:`invalidate`, which the cog calls when the daily
+    amounts, the locale or the currency name are changed through commands.
+    """
+
+    def __init__(self, currency_ttl: int = 300, max_size: int = 64):
+        self.currency_ttl = currency_ttl
+        self.max_size = max_size
+        self._currencies: Dict[Optional[int], Tuple[str, float]] = {}
+        self._templates: "OrderedDict[tuple, MessageTemplates]" = OrderedDict()
+
+    def invalidate(self):
+        """Drop all templates and cached currency names."""
+        self._currencies.clear()
+        self._templates.clear()
+
+    async def currency_name(self, guild: discord.Guild = None) -> str:
+        key = guild.id if guild else None
+        cached = self._currencies.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        name = await bank.get_currency_name(guild)
+        self._currencies[key] = (name, time.monotonic() + self.currency_ttl)
+        return name
+
+    async def get(
+        self, bot_user: discord.ClientUser, daily_rewards: dict, guild: discord.Guild = None
+    ) -> MessageTemplates:
+        currency = await self.currency_name(guild)
+        key = (
+            get_locale(),
+            currency,
+            bot_user.id,
+            bot_user.name,
+            daily_rewards["amount"],
+            daily_rewards["weekend_bonus_amount"],
+        )
+        templates = self._templates.get(key)
+        if templates is None:
+            templates = MessageTemplates(
+                bot_user=bot_user,
+                currency=currency,
+                amount=daily_rewards["amount"],
+                weekend_amount=daily_rewards["weekend_bonus_amount"],
+            )
+            self._templates[key] = templates
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(key)
+        return templates
@@ -0,0 +1,102 @@
+import time
+import heapq
+import random
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("dbltools_trace", default=None)
+
+
+class Trace:
+    """Timings of the spans awaited by one handler call."""
+
+    __slots__ = ("name", "started", "duration", "spans")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self.duration = 0.0
+        self.spans: List[Tuple[str, str, float]] = []  # (category, label, seconds)
+
+    def __lt__(self, other: "Trace"):
+        return self.duration < other.duration
+
+    def breakdown(self) -> Dict[str, float]:
+        """Seconds spent per category, with the time spent outside spans as ``other``."""
+        totals: Dict[str, float] = {}
+        for category, _, duration in self.spans:
+            totals[category] = totals.get(category, 0.0) + duration
+        totals["other"] = max(0.0, self.duration - sum(totals.values()))
+        return totals
+
+
+class Tracer:
+    """Sample handler calls and keep the slowest ones above a threshold.
+
+    Nothing is recorded unless ``sample_rate`` is above 0, and :func:`span` is a no-op outside
+    of a sampled trace, so the cost stays negligible while tracing is off.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, threshold: float = 0.5, keep: int = 20):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.keep = keep
+        self._slowest: List[Trace] = []
+
+    @contextmanager
+    def trace(self, name: str):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            yield None
+            return
+        trace = Trace(name)
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.duration = time.perf_counter() - start
+            _current_trace.reset(token)
+            if trace.duration >= self.threshold:
+                if len(self._slowest) < self.keep:
+                    heapq.heappush(self._slowest, trace)
+                else:
+                    heapq.heappushpop(self._slowest, trace)
+
+    def slowest(self) -> List[Trace]:
+        return sorted(self._slowest, reverse=True)
+
+    def clear(self):
+        self._slowest = []
+
+
+@contextmanager
+def span(category: str, label: str = ""):
+    """Time the enclosed block as part of the current trace, if any.
+
+    ``category`` is one of ``config``, ``bank``, ``discord`` or ``topgg``.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans.append((category, label, time.perf_counter() - start))
+
+
+def traced(name: str):
+    """Trace calls of a cog method with the cog's ``tracer``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(cog, *args, **kwargs):
+            with cog.tracer.trace(name):
+                return await func(cog, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -3,6 +3,7 @@ from redbot.core import bank, commands
 from redbot.core.i18n import Translator
 
 import aiohttp
+import asyncio
 from io import BytesIO
 from datetime import datetime
 
@@ -45,8 +46,11 @@ def check_weekend():
     return True if datetime.today().weekday() in [4, 5, 6] else False
 
 
-async def download_widget(session: aiohttp.ClientSession, url: str):
-    async with session.get(url) as resp:
-        if resp.status != 200:
-            return None
-        return BytesIO(await resp.read())
+async def download_widget(session: aiohttp.ClientSession, url: str, timeout: int = 10):
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            if resp.status != 200:
+                return None
+            return BytesIO(await resp.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
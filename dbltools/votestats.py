@@ -0,0 +1,142 @@
+import os
+import time
+import struct
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class VoteStats:
+    """Ring buffers of per-minute and per-hour vote counts.
+
+    Each ring stores the counts in an ``array`` alongside the bucket index (minutes or hours
+    since epoch) it currently holds, so stale buckets are detected and recycled without
+    having to clear the whole ring.
+    """
+
+    MINUTE_BUCKETS = 1440  # 24 hours
+    HOUR_BUCKETS = 720  # 30 days
+
+    _MAGIC = b"DVS1"
+    _HEADER = struct.Struct("<4sIIQ")  # magic, itemsize, first hour seen, total votes
+
+    def __init__(self):
+        self.minutes = array("I", bytes(4 * self.MINUTE_BUCKETS))
+        self.minute_stamps = array("I", bytes(4 * self.MINUTE_BUCKETS))
+        self.hours = array("I", bytes(4 * self.HOUR_BUCKETS))
+        self.hour_stamps = array("I", bytes(4 * self.HOUR_BUCKETS))
+        self.first_hour = 0
+        self.total = 0
+        self.dirty = False
+
+    def record(self, timestamp: Optional[float] = None, count: int = 1):
+        """Add ``count`` votes at ``timestamp`` (defaults to now)."""
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        minute, hour = timestamp // 60, timestamp // 3600
+        self._bump(self.minutes, self.minute_stamps, minute, count)
+        self._bump(self.hours, self.hour_stamps, hour, count)
+        if not self.first_hour or hour < self.first_hour:
+            self.first_hour = hour
+        self.total += count
+        self.dirty = True
+
+    @staticmethod
+    def _bump(counts: array, stamps: array, bucket: int, count: int):
+        index = bucket % len(counts)
+        if stamps[index] != bucket:
+            stamps[index] = bucket
+            counts[index] = 0
+        counts[index] += count
+
+    @staticmethod
+    def _window(counts: array, stamps: array, end: int, size: int):
+        """Yield ``(bucket, count)`` for the ``size`` buckets ending at ``end``, oldest first."""
+        length = len(counts)
+        for bucket in range(end - min(size, length) + 1, end + 1):
+            index = bucket % length
+            yield bucket, counts[index] if stamps[index] == bucket else 0
+
+    def count_since(self, seconds: int, now: Optional[float] = None) -> int:
+        """Number of votes received in the last ``seconds``.
+
+        Windows up to 24 hours are read from the minute ring, longer ones from the hour ring.
+        """
+        now = int(now if now is not None else time.time())
+        if seconds <= self.MINUTE_BUCKETS * 60:
+            size = max(1, seconds // 60)
+            return sum(
+                c for _, c in self._window(self.minutes, self.minute_stamps, now // 60, size)
+            )
+        size = max(1, seconds // 3600)
+        return sum(c for _, c in self._window(self.hours, self.hour_stamps, now // 3600, size))
+
+    def hourly_series(self, hours: int, now: Optional[float] = None) -> List[int]:
+        """Per-hour vote counts for the last ``hours`` hours, oldest first."""
+        now = int(now if now is not None else time.time())
+        return [c for _, c in self._window(self.hours, self.hour_stamps, now // 3600, hours)]
+
+    def peak_minute(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """``(timestamp, count)`` of the busiest minute over the last 24 hours."""
+        now = int(now if now is not None else time.time())
+        window = self._window(self.minutes, self.minute_stamps, now // 60, self.MINUTE_BUCKETS)
+        bucket, count = max(window, key=lambda item: item[1])
+        return bucket * 60, count
+
+    def peak_hour(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """``(timestamp, count)`` of the busiest hour over the last 30 days."""
+        now = int(now if now is not None else time.time())
+        window = self._window(self.hours, self.hour_stamps, now // 3600, self.HOUR_BUCKETS)
+        bucket, count = max(window, key=lambda item: item[1])
+        return bucket * 3600, count
+
+    def weekend_effect(self, now: Optional[float] = None) -> Tuple[float, float]:
+        """Average votes per hour on week-end days and on other days.
+
+        Week-end days are the ones used for the week-end bonus (see ``utils.check_weekend``).
+        Only hours since the first recorded vote are taken into account.
+        """
+        now = int(now if now is not None else time.time())
+        sums, hours = [0, 0], [0, 0]
+        for bucket, count in self._window(
+            self.hours, self.hour_stamps, now // 3600, self.HOUR_BUCKETS
+        ):
+            if not self.first_hour or bucket < self.first_hour:
+                continue
+            weekend = int(datetime.fromtimestamp(bucket * 3600).weekday() in [4, 5, 6])
+            sums[weekend] += count
+            hours[weekend] += 1
+        return (
+            sums[1] / hours[1] if hours[1] else 0.0,
+            sums[0] / hours[0] if hours[0] else 0.0,
+        )
+
+    def save(self, path: Path):
+        """Write the rings to ``path``, replacing it atomically."""
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("wb") as fp:
+            fp.write(
+                self._HEADER.pack(self._MAGIC, self.minutes.itemsize, self.first_hour, self.total)
+            )
+            for arr in (self.minutes, self.minute_stamps, self.hours, self.hour_stamps):
+                arr.tofile(fp)
+        os.replace(tmp, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "VoteStats":
+        """Read rings saved by :meth:`save`, or return empty ones if unreadable."""
+        stats = cls()
+        try:
+            with path.open("rb") as fp:
+                magic, itemsize, first_hour, total = cls._HEADER.unpack(fp.read(cls._HEADER.size))
+                if magic != cls._MAGIC or itemsize != stats.minutes.itemsize:
+                    return stats
+                for arr in (stats.minutes, stats.minute_stamps, stats.hours, stats.hour_stamps):
+                    length = len(arr)
+                    del arr[:]
+                    arr.fromfile(fp, length)
+        except (OSError, EOFError, struct.error):
+            return cls()
+        stats.first_hour, stats.total = first_hour, total
+        return stats
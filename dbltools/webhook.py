@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from aiohttp import web
+
+log = logging.getLogger("red.predacogs.DblTools.webhook")
+
+
+class VoteWebhook:
+    """Top.gg webhook server with bounded admission.
+
+    Received votes go to a queue processed by ``workers`` tasks. Once ``high_water`` votes are
+    waiting, new ones are refused with a 503 and a ``Retry-After`` header, so Top.gg delivers
+    them again later instead of the bot buffering them without limit.
+
+    Each vote is also passed to ``dispatch`` as a ``dbl_vote`` or ``dbl_test`` event, like
+    dblpy's own webhook does, so other cogs listening to those keep working.
+    """
+
+    def __init__(
+        self,
+        on_vote: Callable[[dict], Awaitable],
+        on_test: Callable[[dict], Awaitable],
+        *,
+        dispatch: Optional[Callable[..., None]] = None,
+        auth: str,
+        port: int,
+        path: str = "/dblwebhook",
+        high_water: int = 500,
+        workers: int = 4,
+        retry_after: int = 60,
+    ):
+        self.on_vote = on_vote
+        self.on_test = on_test
+        self.dispatch = dispatch
+        self.auth = auth
+        self.port = port
+        self.path = path
+        self.high_water = high_water
+        self.workers = workers
+        self.retry_after = retry_after
+
+        self.queue: "asyncio.Queue[dict]" = asyncio.Queue()
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.accepted = 0
+        self.shed = 0
+        self.processed = 0
+        self.failed = 0
+        self.peak_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def _receive(self, request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != self.auth:
+            return web.Response(status=401)
+        if self.queue.qsize() >= self.high_water:
+            self.shed += 1
+            return web.Response(status=503, headers={"Retry-After": str(self.retry_after)})
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+        self.queue.put_nowait(data)
+        self.accepted += 1
+        self.peak_depth = max(self.peak_depth, self.queue.qsize())
+        return web.Response()
+
+    async def _work(self):
+        while True:
+            data = await self.queue.get()
+            try:
+                is_test = data.get("type") == "test"
+                if self.dispatch is not None:
+                    self.dispatch("dbl_test" if is_test else "dbl_vote", data)
+                if is_test:
+                    await self.on_test(data)
+                else:
+                    await self.on_vote(data)
+                self.processed += 1
+            except Exception as error:
+                self.failed += 1
+                log.exception("Failed to process vote %s.", data, exc_info=error)
+            finally:
+                self.queue.task_done()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post(self.path, self._receive)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: int = 10):
+        """Stop receiving votes, then give workers ``drain_timeout`` seconds to finish the queue."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                log.warning("Stopped the webhook server with %s votes left.", self.queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []